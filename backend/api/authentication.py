@@ -0,0 +1,40 @@
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import TokenUser
+
+# Default authentication of the API (settings.REST_FRAMEWORK).
+
+
+class TokenUserAuthentication(JWTAuthentication):
+    """JWT authentication that trusts the token instead of looking the user up on every request.
+
+    Access tokens issued by MyTokenObtainPairSerializer carry the user's id, username and left_handed, from
+    which a TokenUser is built for read-only requests (GET, HEAD, OPTIONS) without touching the database.
+    Every other request loads the user like JWTAuthentication does, so a deleted or deactivated user cannot
+    change anything, even before the token expires (ACCESS_TOKEN_LIFETIME).
+    Tokens without these claims (issued before they were added) always load the user.
+    """
+
+    read_only = False
+
+    def authenticate(self, request):
+        self.read_only = request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken("Token contained no recognizable user identification")
+        claims = {name: validated_token.get(name) for name in TokenUser.CLAIM_FIELDS if name != 'id'}
+        if not self.read_only or None in claims.values():
+            return super().get_user(validated_token)
+        return TokenUser.from_claims(validated_token[api_settings.USER_ID_CLAIM], claims)
+
+
+def load_user(user):
+    """The request's user with every field fresh from the database, for views that return user data."""
+    if isinstance(user, TokenUser):
+        return user.load()
+    return user
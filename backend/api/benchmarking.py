@@ -0,0 +1,79 @@
+import threading
+import time
+
+from django.db import connections
+
+# Small helpers shared by the bench_* management commands.
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, elapsed):
+    """Throughput and latency percentiles (in ms) for a list of per-call latencies in seconds."""
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "mean_ms": sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def run_concurrently(fn, concurrency, total_calls):
+    """Calls fn(call_index) total_calls times spread over `concurrency` threads.
+
+    Returns (latencies in seconds, wall time in seconds). Every thread closes its own database
+    connections when it is done, since Django opens one per thread.
+    """
+    latencies = []
+    latencies_lock = threading.Lock()
+    next_call = iter(range(total_calls))
+    next_call_lock = threading.Lock()
+    errors = []
+
+    def worker():
+        own = []
+        try:
+            while True:
+                with next_call_lock:
+                    call_index = next(next_call, None)
+                if call_index is None:
+                    break
+                start = time.perf_counter()
+                fn(call_index)
+                own.append(time.perf_counter() - start)
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            connections.close_all()
+            with latencies_lock:
+                latencies.extend(own)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    if errors:
+        raise errors[0]
+    return latencies, elapsed
+
+
+def format_row(label, stats):
+    return (f"{label:<28} {stats['requests']:>7} {stats['throughput']:>10.1f} "
+            f"{stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f}")
+
+
+def format_header(label="run"):
+    return f"{label:<28} {'requests':>7} {'req/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
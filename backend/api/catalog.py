@@ -0,0 +1,90 @@
+import time
+from urllib.parse import quote
+
+from django.core.cache import caches
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+# Cache of the lesson catalog (categories, lessons, lesson count).
+# The catalog only changes when an admin edits it, so the serialized list payloads are kept in the 'catalog'
+# cache and served without touching the database. Every entry is stored under the current catalog version;
+# saving or deleting a Category or Lesson (see signals.py) bumps the version, which invalidates all entries
+# at once. The version is also the ETag of every catalog response, so an unchanged catalog costs a 304.
+#
+# The version is a millisecond timestamp that only moves forward, so it keeps increasing across restarts
+# and cache evictions. With the default in-memory cache each process has its own copy: an edit is seen
+# immediately by the process that made it and by the others once their version expires
+# (settings.CATALOG_CACHE_TIMEOUT). Queryset.update() and other bulk writes send no signals, call bump_version().
+
+VERSION_KEY = 'catalog-version'
+
+
+def get_cache():
+    return caches['catalog']
+
+
+def get_version():
+    cache = get_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, int(time.time() * 1000))
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    cache = get_cache()
+    version = max((cache.get(VERSION_KEY) or 0) + 1, int(time.time() * 1000))
+    cache.set(VERSION_KEY, version)
+    return version
+
+
+def clear():
+    get_cache().clear()
+
+
+def get_payload(key, build):
+    """The cached payload for key at the current version, calling build() to fill it on a miss."""
+    version = get_version()
+    data = get_cache().get(key, version=version)
+    if data is None:
+        data = build()
+        get_cache().set(key, data, version=version)
+    return data
+
+
+def cached_response(request, key, build_response):
+    """GET response for one catalog endpoint.
+
+    build_response() is the endpoint's normal (uncached) response, its data is only cached when it succeeded.
+    """
+    version = get_version()
+    etag = quote_etag(f'catalog-{version}')
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        data = get_cache().get(key, version=version)
+        if data is not None:
+            response = Response(data)
+        else:
+            response = build_response()
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            get_cache().set(key, response.data, version=version)
+    response['ETag'] = etag
+    response['X-Catalog-Version'] = version
+    return response
+
+
+def request_key(name, request, params):
+    """Cache key for a list endpoint, from the query parameters that change its result (case-insensitively)."""
+    values = [f"{param}={key_value(request.query_params.get(param, ''))}" for param in params]
+    return ':'.join([name] + values)
+
+
+def key_value(value):
+    # Filter values come from the URL as typed, e.g. a category name with a space. Cache keys must not contain
+    # spaces or control characters (memcached rejects them), so the value is URL-quoted, which also keeps
+    # different values apart.
+    return quote(value.strip().lower())
@@ -0,0 +1,117 @@
+import threading
+import queue
+import time
+from concurrent.futures import Future
+
+import numpy as np
+from django.conf import settings
+
+from .numpy_model import NumpyMLP
+
+# Server side sign classification.
+# The weights are the NumPy export of the alphabet model (ml-pipeline/numpy_model.py) and the forward
+# pass is numpy_model.NumpyMLP, which ml-pipeline imports from here, so the API does not depend on
+# TensorFlow. The model is loaded once per process, on first use, and every request goes through a
+# MicroBatcher that merges requests arriving at the same time into a single forward pass.
+
+NUM_COORDS = 42
+
+
+class MicroBatcher:
+    """Runs predict_fn on a background thread over batches of concurrently submitted inputs.
+
+    Every forward pass takes all requests that queued up while the previous one was running, up to
+    max_batch_size rows, so a lone request is never delayed. With max_wait > 0 a batch additionally
+    waits that many seconds for more requests. Each caller gets back only its own rows.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=256, max_wait=0.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._pending = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, inputs):
+        """Queues a (N, 42) array, returns a Future resolving to its (N, classes) probabilities."""
+        future = Future()
+        self._ensure_running()
+        self._pending.put((inputs, future))
+        return future
+
+    def predict(self, inputs, timeout=None):
+        return self.submit(inputs).result(timeout)
+
+    def _ensure_running(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="sign-classifier-batcher", daemon=True)
+                    self._thread.start()
+
+    def _next_batch(self):
+        batch = [self._pending.get()]
+        rows = len(batch[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while rows < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    item = self._pending.get(timeout=remaining)
+                else:
+                    item = self._pending.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+            rows += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                probabilities = self.predict_fn(np.concatenate([inputs for inputs, _ in batch]))
+            except Exception as exc:
+                for _, future in batch:
+                    future.set_exception(exc)
+                continue
+
+            offset = 0
+            for inputs, future in batch:
+                future.set_result(probabilities[offset:offset + len(inputs)])
+                offset += len(inputs)
+
+
+_classifier = None
+_batcher = None
+_load_lock = threading.Lock()
+
+
+def get_classifier():
+    """The process wide NumpyMLP, loaded from settings.SIGN_MODEL_PATH on first use."""
+    global _classifier
+    if _classifier is None:
+        with _load_lock:
+            if _classifier is None:
+                _classifier = NumpyMLP.load(settings.SIGN_MODEL_PATH)
+    return _classifier
+
+
+def get_batcher():
+    global _batcher
+    if _batcher is None:
+        with _load_lock:
+            if _batcher is None:
+                config = settings.SIGN_CLASSIFIER
+                _batcher = MicroBatcher(
+                    lambda x: get_classifier().predict(x),
+                    max_batch_size=config["MAX_BATCH_SIZE"],
+                    max_wait=config["MAX_WAIT_MS"] / 1000,
+                )
+    return _batcher
+
+
+def classify(landmarks):
+    """Class probabilities for a (N, 42) array of normalized landmarks."""
+    return get_batcher().predict(landmarks, timeout=settings.SIGN_CLASSIFIER["TIMEOUT_SECONDS"])
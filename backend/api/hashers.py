@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+# Password hashing, configured by settings.PASSWORD_HASHERS.
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """Django's default hasher with the iteration count taken from settings.PBKDF2_ITERATIONS.
+
+    It keeps the pbkdf2_sha256 algorithm name, so existing hashes stay valid. A hash made with another
+    iteration count (or by another hasher listed in PASSWORD_HASHERS) is replaced on the user's next
+    successful login, since check_password rehashes whenever the hasher reports must_update.
+    """
+
+    @property
+    def iterations(self):
+        # read on every use, get_hasher() keeps one instance per process
+        return settings.PBKDF2_ITERATIONS or PBKDF2PasswordHasher.iterations
@@ -0,0 +1,195 @@
+import json
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+# Per-endpoint cost of the API: wall time, SQL queries (count, time, repeats) and response size.
+# PerfMiddleware times every request, optionally counts its queries through a connection execute wrapper,
+# adds a Server-Timing header (visible in the browser's network tab) and aggregates everything per endpoint
+# into the in-process `stats`. Every process periodically writes its aggregate to
+# settings.PERF_INSTRUMENTATION["DUMP_DIR"], `manage.py perf_report` merges and prints them.
+# Switched on with the PERF_INSTRUMENTATION environment variable, see settings.py.
+
+# upper bounds (ms) of the latency histogram buckets, the last one catches everything slower
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, float('inf'))
+
+
+class QueryRecorder:
+    """Execute wrapper counting a request's queries.
+
+    duplicates are exact repeats (same SQL and parameters). similar are repeats of the same SQL whatever the
+    parameters, the usual sign of a query run once per row (N+1).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = Counter()
+        self.templates = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+            self.templates[sql] += 1
+            self.statements[(sql, repr(params))] += 1
+
+    @property
+    def duplicates(self):
+        return sum(n - 1 for n in self.statements.values())
+
+    @property
+    def similar(self):
+        return sum(n - 1 for n in self.templates.values())
+
+
+SUMMED = ("requests", "errors", "total_ms", "queries", "sql_ms", "duplicates", "similar", "bytes")
+MAXED = ("max_ms", "max_queries")
+
+
+def empty_entry():
+    entry = dict.fromkeys(SUMMED + MAXED, 0)
+    entry["histogram"] = [0] * len(BUCKETS_MS)
+    return entry
+
+
+def add_entry(total, entry):
+    for key in SUMMED:
+        total[key] += entry[key]
+    for key in MAXED:
+        total[key] = max(total[key], entry[key])
+    total["histogram"] = [a + b for a, b in zip(total["histogram"], entry["histogram"])]
+
+
+class EndpointStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.endpoints = {}
+
+    def record(self, endpoint, status, seconds, queries, sql_seconds, duplicates, similar, response_bytes):
+        ms = seconds * 1000
+        request = {
+            "requests": 1, "errors": int(status >= 500), "total_ms": ms, "max_ms": ms, "queries": queries,
+            "max_queries": queries, "sql_ms": sql_seconds * 1000, "duplicates": duplicates, "similar": similar,
+            "bytes": response_bytes, "histogram": [int(i == bucket_index(ms)) for i in range(len(BUCKETS_MS))],
+        }
+        with self.lock:
+            add_entry(self.endpoints.setdefault(endpoint, empty_entry()), request)
+
+    def snapshot(self):
+        with self.lock:
+            return json.loads(json.dumps(self.endpoints))
+
+    def reset(self):
+        with self.lock:
+            self.endpoints = {}
+
+
+stats = EndpointStats()
+
+
+def bucket_index(ms):
+    return next(i for i, bound in enumerate(BUCKETS_MS) if ms <= bound)
+
+
+def merge(snapshots):
+    """Adds up several snapshots (e.g. one per worker process) into one."""
+    merged = {}
+    for snapshot in snapshots:
+        for endpoint, entry in snapshot.items():
+            add_entry(merged.setdefault(endpoint, empty_entry()), entry)
+    return merged
+
+
+def histogram_percentile(histogram, pct, max_ms):
+    """Upper bound (ms) of the bucket holding the pct-th percentile, at most max_ms, the slowest request.
+
+    The last bucket has no upper bound, capping it keeps the result finite (and valid JSON).
+    """
+    total = sum(histogram)
+    if not total:
+        return 0.0
+    seen = 0
+    for bound, count in zip(BUCKETS_MS, histogram):
+        seen += count
+        if seen >= pct / 100 * total:
+            return min(bound, max_ms)
+    return max_ms
+
+
+def dump_path(dump_dir, pid=None):
+    return os.path.join(dump_dir, f"perf-{pid or os.getpid()}.json")
+
+
+def dump(dump_dir):
+    os.makedirs(dump_dir, exist_ok=True)
+    path = dump_path(dump_dir)
+    with open(path + ".tmp", "w") as f:
+        json.dump(stats.snapshot(), f)
+    os.replace(path + ".tmp", path)
+
+
+def load_dumps(dump_dir):
+    snapshots = []
+    if os.path.isdir(dump_dir):
+        for name in sorted(os.listdir(dump_dir)):
+            if name.startswith("perf-") and name.endswith(".json"):
+                with open(os.path.join(dump_dir, name)) as f:
+                    snapshots.append(json.load(f))
+    return snapshots
+
+
+def endpoint_name(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return f"{request.method} <unresolved>"
+    # router URLs are regexes, drop their end anchor
+    return f"{request.method} /{match.route.rstrip('$')}"
+
+
+class PerfMiddleware:
+    def __init__(self, get_response):
+        config = settings.PERF_INSTRUMENTATION
+        if not config["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.track_sql = config["TRACK_SQL"]
+        self.server_timing = config["SERVER_TIMING"]
+        self.dump_dir = config["DUMP_DIR"]
+        self.dump_every = config["DUMP_EVERY_SECONDS"]
+        self.last_dump = time.monotonic()
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            if self.track_sql:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(recorder))
+            response = self.get_response(request)
+        seconds = time.perf_counter() - start
+
+        size = 0 if response.streaming else len(response.content)
+        stats.record(endpoint_name(request), response.status_code, seconds, recorder.count, recorder.seconds,
+                     recorder.duplicates, recorder.similar, size)
+
+        if self.server_timing:
+            timing = [f"app;dur={seconds * 1000:.1f}"]
+            if self.track_sql:
+                timing.append(f'db;dur={recorder.seconds * 1000:.1f};desc="{recorder.count} queries, {recorder.duplicates} repeated"')
+            response["Server-Timing"] = ", ".join(timing)
+            response["Timing-Allow-Origin"] = "*" # the frontend is served from another origin
+
+        if self.dump_dir and time.monotonic() - self.last_dump >= self.dump_every:
+            self.last_dump = time.monotonic()
+            dump(self.dump_dir)
+        return response
@@ -0,0 +1,96 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Sum
+
+from .models import LeaderboardBucket
+
+# Ranking users by total_points.
+# - The top K users are read through the (-total_points, id) index and cached; awarding points updates the
+#   cached list in place when the user is or gets into the top K, instead of dropping it.
+# - A user's rank is 1 + the number of users with more points, summed over LeaderboardBucket (one row per
+#   distinct point total) rather than counted over the user table, so it stays cheap with millions of users.
+# Ties share a rank ("1224" ranking). Users without points are not on the board and rank after everyone.
+# The buckets follow record_points() and user deletion; anything else that changes total_points (the admin,
+# Queryset.update()) needs `manage.py rebuild_leaderboard` afterwards.
+
+User = get_user_model()
+
+TOP_KEY = 'leaderboard-top'
+
+
+def top_users():
+    """The cached top K as a list of {"id", "username", "total_points"}, best first."""
+    top = cache.get(TOP_KEY)
+    if top is None:
+        top = list(User.objects.filter(total_points__gt=0).order_by('-total_points', 'id')
+                   .values('id', 'username', 'total_points')[:settings.LEADERBOARD['TOP_K']])
+        cache.set(TOP_KEY, top, settings.LEADERBOARD['CACHE_TIMEOUT'])
+    return top
+
+
+def ranked(top):
+    """Adds the rank to every entry of a best-first list."""
+    rows = []
+    for position, entry in enumerate(top):
+        if position and entry['total_points'] == top[position - 1]['total_points']:
+            rank = rows[-1]['rank']
+        else:
+            rank = position + 1
+        rows.append(dict(entry, rank=rank))
+    return rows
+
+
+def rank_for_points(points):
+    above = LeaderboardBucket.objects.filter(points__gt=points).aggregate(users=Sum('users'))['users']
+    return (above or 0) + 1
+
+
+def record_points(user, old_points, new_points):
+    """Moves the user from their old to their new point total, in the caller's transaction."""
+    if old_points == new_points:
+        return
+    if old_points > 0:
+        LeaderboardBucket.objects.filter(points=old_points).update(users=F('users') - 1)
+    if new_points > 0:
+        LeaderboardBucket.objects.get_or_create(points=new_points)
+        LeaderboardBucket.objects.filter(points=new_points).update(users=F('users') + 1)
+    transaction.on_commit(lambda: update_top(user.pk, user.username, old_points, new_points))
+
+
+def remove_user(points):
+    if points > 0:
+        LeaderboardBucket.objects.filter(points=points).update(users=F('users') - 1)
+    cache.delete(TOP_KEY)
+
+
+def update_top(user_id, username, old_points, new_points):
+    top = cache.get(TOP_KEY)
+    if top is None:
+        return # rebuilt on the next read
+    others = [entry for entry in top if entry['id'] != user_id]
+    was_in_top = len(others) < len(top)
+    top_k = settings.LEADERBOARD['TOP_K']
+    if was_in_top and new_points < old_points:
+        # someone outside the cached list may now belong in it
+        cache.delete(TOP_KEY)
+        return
+    if new_points <= 0:
+        return
+    if was_in_top or len(top) < top_k or (new_points, -user_id) > (top[-1]['total_points'], -top[-1]['id']):
+        others.append({'id': user_id, 'username': username, 'total_points': new_points})
+        others.sort(key=lambda entry: (-entry['total_points'], entry['id']))
+        cache.set(TOP_KEY, others[:top_k], settings.LEADERBOARD['CACHE_TIMEOUT'])
+
+
+def rebuild():
+    """Recomputes every bucket from the user table with one grouped query."""
+    with transaction.atomic():
+        LeaderboardBucket.objects.all().delete()
+        totals = User.objects.filter(total_points__gt=0).values('total_points').annotate(users=Count('id'))
+        LeaderboardBucket.objects.bulk_create(
+            [LeaderboardBucket(points=row['total_points'], users=row['users']) for row in totals.iterator()],
+            batch_size=5000,
+        )
+    cache.delete(TOP_KEY)
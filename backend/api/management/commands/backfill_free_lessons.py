@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import Lesson
+from api.provisioning import backfill_free_lessons, free_lesson_ids
+
+
+class Command(BaseCommand):
+    help = ('Unlocks the free lessons (unlock_cost=0) for every existing user, in chunks. '
+            'Run it after adding a free lesson, new users get theirs when they register.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lesson', type=int, nargs='+', dest='lessons',
+                            help='only these lesson ids (default: every free lesson)')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='users per transaction')
+        parser.add_argument('--batch-size', type=int, default=5000, help='rows per INSERT')
+
+    def handle(self, *args, **options):
+        lesson_ids = free_lesson_ids()
+        if options['lessons']:
+            not_free = set(options['lessons']) - set(lesson_ids)
+            if not_free:
+                found = set(Lesson.objects.filter(pk__in=not_free).values_list('pk', flat=True))
+                missing = not_free - found
+                raise CommandError(f"Lessons {sorted(missing)} do not exist" if missing else f"Lessons {sorted(not_free)} are not free")
+            lesson_ids = options['lessons']
+        if not lesson_ids:
+            self.stdout.write("There are no free lessons.")
+            return
+
+        self.stdout.write(f"Backfilling {len(lesson_ids)} free lessons...")
+        start = time.perf_counter()
+
+        def progress(users, rows):
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f"  {users} users, {rows} rows, {rows / elapsed:.0f} rows/s")
+
+        users, rows = backfill_free_lessons(lesson_ids, options['chunk_size'], options['batch_size'], progress)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {users} users in {elapsed:.1f}s ({users / elapsed if elapsed else 0:.0f} users/s, "
+            f"{rows / elapsed if elapsed else 0:.0f} rows/s)"))
@@ -0,0 +1,61 @@
+import json
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api import classifier
+from api.benchmarking import format_header, format_row, run_concurrently, summarize
+from api.views import ClassifySignView
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Load-tests the sign classification endpoint at increasing concurrency, with and without micro-batching.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32])
+        parser.add_argument('--requests', type=int, default=2000, help='requests per concurrency level')
+        parser.add_argument('--vectors', type=int, default=1, help='landmark vectors per request')
+        parser.add_argument('--json', help='also write the results to this file')
+
+    def handle(self, *args, **options):
+        # the view is called in-process, with an unsaved user so no database is involved
+        factory = APIRequestFactory()
+        view = ClassifySignView.as_view()
+        user = User(username='bench')
+        rng = np.random.default_rng(0)
+        payloads = [{'landmarks': rng.uniform(-1, 1, (options['vectors'], 42)).tolist()} for _ in range(64)]
+
+        def call(call_index):
+            request = factory.post('/api/classify/', payloads[call_index % len(payloads)], format='json')
+            force_authenticate(request, user=user)
+            response = view(request)
+            if response.status_code != 200:
+                raise RuntimeError(f"classify returned {response.status_code}: {response.data}")
+
+        model = classifier.get_classifier()
+        batched = classifier.get_batcher()
+        modes = {
+            'batched': batched,
+            'unbatched': classifier.MicroBatcher(model.predict, max_batch_size=1, max_wait=0),
+        }
+
+        results = []
+        self.stdout.write(format_header('mode / concurrency'))
+        for concurrency in options['concurrency']:
+            for mode, batcher in modes.items():
+                classifier._batcher = batcher
+                run_concurrently(call, concurrency, min(100, options['requests'])) # warm up
+                stats = summarize(*run_concurrently(call, concurrency, options['requests']))
+                stats.update(mode=mode, concurrency=concurrency, vectors=options['vectors'])
+                results.append(stats)
+                self.stdout.write(format_row(f'{mode} x{concurrency}', stats))
+        classifier._batcher = batched
+
+        if options['json']:
+            with open(options['json'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['json']}"))
@@ -0,0 +1,91 @@
+import json
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, connections
+from django.test import override_settings
+from django.test.utils import setup_databases, teardown_databases
+from rest_framework.test import APIClient
+
+from api.benchmarking import format_header, format_row, run_concurrently, summarize
+from api.models import Lesson
+
+User = get_user_model()
+
+# Connection settings compared on SQLite. "rollback journal" is SQLite's default, as the project ran before.
+SQLITE_MODES = {
+    'rollback journal': {'pragmas': {'journal_mode': 'DELETE', 'synchronous': 'FULL'}, 'conn_max_age': 0},
+    'WAL': {'pragmas': {'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'busy_timeout': 5000}, 'conn_max_age': 0},
+    'WAL + persistent': {'pragmas': {'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'busy_timeout': 5000}, 'conn_max_age': 600},
+}
+# On PostgreSQL only the connection lifetime changes
+POSTGRES_MODES = {
+    'connect per request': {'conn_max_age': 0},
+    'persistent': {'conn_max_age': 600},
+}
+
+
+class Command(BaseCommand):
+    help = ('Compares write throughput of the configured database under several connection settings: progress '
+            'POSTs from concurrent clients, through the full request cycle so connections are closed or kept '
+            'like in production. Runs on a throwaway test database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+        parser.add_argument('--requests', type=int, default=1000, help='requests per mode and concurrency level')
+        parser.add_argument('--mode', action='append', help='only these modes (repeatable)')
+        parser.add_argument('--json', help='also write the results to this file')
+
+    def handle(self, *args, **options):
+        old_config = setup_databases(options['verbosity'], interactive=False)
+        try:
+            results = self.run(options)
+        finally:
+            connections.close_all()
+            teardown_databases(old_config, options['verbosity'])
+
+        if options['json']:
+            with open(options['json'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['json']}"))
+
+    def run(self, options):
+        modes = SQLITE_MODES if connection.vendor == 'sqlite' else POSTGRES_MODES
+        if options['mode']:
+            modes = {name: mode for name, mode in modes.items() if name in options['mode']}
+        lessons = Lesson.objects.bulk_create([Lesson(sign_name=f'bench {i}', description='', completion_points=5) for i in range(20)])
+        database = settings.DATABASES['default']
+        default_conn_max_age = database.get('CONN_MAX_AGE', 0)
+
+        results = []
+        self.stdout.write(f"{connection.vendor} test database {connection.settings_dict['NAME']}")
+        self.stdout.write(format_header('mode / concurrency') + f" {'errors':>7}")
+        try:
+            for name, mode in modes.items():
+                # connections opened from now on use this mode
+                connections.close_all()
+                database['CONN_MAX_AGE'] = mode['conn_max_age']
+                with override_settings(SQLITE_PRAGMAS=mode.get('pragmas', settings.SQLITE_PRAGMAS)):
+                    for concurrency in options['concurrency']:
+                        users = User.objects.bulk_create([User(username=f'bench-{uuid.uuid4().hex}') for _ in range(concurrency)])
+                        errors = []
+
+                        def post(call_index):
+                            client = APIClient()
+                            client.force_authenticate(users[call_index % len(users)])
+                            try:
+                                response = client.post(f'/api/progress/lesson/{lessons[call_index % len(lessons)].id}/')
+                                if response.status_code != 200:
+                                    errors.append(response.status_code)
+                            except OperationalError as exc: # "database is locked"
+                                errors.append(str(exc))
+
+                        stats = summarize(*run_concurrently(post, concurrency, options['requests']))
+                        stats.update(mode=name, concurrency=concurrency, errors=len(errors))
+                        results.append(stats)
+                        self.stdout.write(format_row(f'{name} x{concurrency}', stats) + f" {len(errors):>7}")
+        finally:
+            database['CONN_MAX_AGE'] = default_conn_max_age
+        return results
@@ -0,0 +1,96 @@
+import json
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test.utils import setup_databases, teardown_databases
+
+from api import leaderboard
+from api.benchmarking import format_header, format_row, summarize
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Benchmarks the leaderboard on a synthetic user table: top-K reads and "my rank" lookups, against '
+            'the naive full sort, in a throwaway test database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1_000_000)
+        parser.add_argument('--max-points', type=int, default=50_000, help='point totals are multiples of 10 up to this')
+        parser.add_argument('--lookups', type=int, default=500, help='rank lookups per method')
+        parser.add_argument('--naive-lookups', type=int, default=5, help='lookups for the full sort, which is O(N)')
+        parser.add_argument('--json', help='also write the results to this file')
+
+    def handle(self, *args, **options):
+        old_config = setup_databases(options['verbosity'], interactive=False)
+        try:
+            results = self.run(options)
+        finally:
+            connections.close_all()
+            teardown_databases(old_config, options['verbosity'])
+            cache.delete(leaderboard.TOP_KEY)
+
+        if options['json']:
+            with open(options['json'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['json']}"))
+
+    def run(self, options):
+        rng = random.Random(0)
+        start = time.perf_counter()
+        for offset in range(0, options['users'], 20_000):
+            User.objects.bulk_create([
+                User(username=f'bench-{i}', email=f'bench{i}@example.com', password='!',
+                     total_points=rng.randrange(0, options['max_points'] // 10) * 10)
+                for i in range(offset, min(options['users'], offset + 20_000))
+            ])
+        leaderboard.rebuild()
+        self.stdout.write(f"{User.objects.count()} users created in {time.perf_counter() - start:.1f}s")
+
+        points = [rng.randrange(0, options['max_points'] // 10) * 10 for _ in range(options['lookups'])]
+        some_user = User.objects.filter(username__startswith='bench-').order_by('pk').values_list('pk', flat=True)[0]
+
+        def naive_rank(p):
+            # what a leaderboard without any of this would do: sort everyone and find yourself
+            return list(User.objects.order_by('-total_points', 'id').values_list('id', flat=True)).index(some_user) + 1
+
+        def uncached_top(p):
+            cache.delete(leaderboard.TOP_KEY)
+            return leaderboard.top_users()
+
+        methods = [
+            ('rank: full sort', naive_rank, options['naive_lookups']),
+            ('rank: indexed count', lambda p: User.objects.filter(total_points__gt=p).count() + 1, options['lookups']),
+            ('rank: buckets', leaderboard.rank_for_points, options['lookups']),
+            ('top-K: query', uncached_top, options['lookups']),
+            ('top-K: cached', lambda p: leaderboard.top_users(), options['lookups']),
+        ]
+        results = {}
+        self.stdout.write(format_header('lookup'))
+        for label, method, count in methods:
+            latencies = []
+            run_start = time.perf_counter()
+            for p in points[:count]:
+                call_start = time.perf_counter()
+                method(p)
+                latencies.append(time.perf_counter() - call_start)
+            stats = summarize(latencies, time.perf_counter() - run_start)
+            results[label] = stats
+            self.stdout.write(format_row(label, stats))
+
+        # the extra work of awarding points: moving the user between buckets
+        user = User.objects.get(pk=some_user)
+        latencies = []
+        run_start = time.perf_counter()
+        for _ in range(options['lookups']):
+            call_start = time.perf_counter()
+            leaderboard.record_points(user, user.total_points, user.total_points + 10)
+            user.total_points += 10
+            latencies.append(time.perf_counter() - call_start)
+        results['award: move bucket'] = summarize(latencies, time.perf_counter() - run_start)
+        self.stdout.write(format_row('award: move bucket', results['award: move bucket']))
+        return results
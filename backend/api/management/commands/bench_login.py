@@ -0,0 +1,96 @@
+import json
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Value
+from django.db.models.functions import Lower
+from django.test.utils import override_settings, setup_databases, teardown_databases
+from rest_framework.test import APIClient
+
+from api.benchmarking import format_header, format_row, run_concurrently, summarize
+
+User = get_user_model()
+
+PASSWORD = 'bench-login-password'
+
+
+class Command(BaseCommand):
+    help = ('Benchmarks login on a synthetic user table in a throwaway test database: the email lookup '
+            '(unindexed iexact vs the LOWER(email) index) and token endpoint throughput per PBKDF2 iteration count.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1_000_000)
+        parser.add_argument('--lookups', type=int, default=1000, help='email lookups through the index')
+        parser.add_argument('--naive-lookups', type=int, default=10, help='email lookups with iexact, which scans the table')
+        parser.add_argument('--iterations', type=int, nargs='+', help='PBKDF2 iteration counts to compare (default: the configured one)')
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4])
+        parser.add_argument('--logins', type=int, default=40, help='logins per iteration count and concurrency level')
+        parser.add_argument('--keepdb', action='store_true', help='keep the seeded test database for the next run')
+        parser.add_argument('--json', help='also write the results to this file')
+
+    def handle(self, *args, **options):
+        old_config = setup_databases(options['verbosity'], interactive=False, keepdb=options['keepdb'])
+        try:
+            results = self.run(options)
+        finally:
+            teardown_databases(old_config, options['verbosity'], keepdb=options['keepdb'])
+
+        if options['json']:
+            with open(options['json'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['json']}"))
+
+    def seed(self, count):
+        existing = User.objects.count()
+        start = time.perf_counter()
+        password = make_password(PASSWORD)
+        for offset in range(existing, count, 20_000):
+            User.objects.bulk_create([
+                User(username=f'login-{i}', email=f'Login.User{i}@Example.com', password=password)
+                for i in range(offset, min(count, offset + 20_000))
+            ])
+        self.stdout.write(f"{connection.vendor}: {User.objects.count()} users ({count - existing} created in {time.perf_counter() - start:.1f}s)")
+
+    def run(self, options):
+        self.seed(options['users'])
+        rng = random.Random(0)
+        emails = [f'login.user{rng.randrange(options["users"])}@example.com' for _ in range(options['lookups'])]
+        results = {'users': options['users'], 'lookup': {}, 'login': []}
+
+        self.stdout.write(format_header('email lookup'))
+        lookups = [
+            ('iexact (scan)', lambda email: User.objects.get(email__iexact=email), options['naive_lookups']),
+            ('LOWER(email) index', lambda email: User.objects.alias(email_lower=Lower('email')).get(email_lower=Lower(Value(email))), options['lookups']),
+        ]
+        for label, lookup, count in lookups:
+            latencies = []
+            start = time.perf_counter()
+            for email in emails[:count]:
+                call_start = time.perf_counter()
+                lookup(email)
+                latencies.append(time.perf_counter() - call_start)
+            results['lookup'][label] = summarize(latencies, time.perf_counter() - start)
+            self.stdout.write(format_row(label, results['lookup'][label]))
+
+        hasher = get_hasher()
+        configured = hasher.iterations
+        self.stdout.write(format_header(f'login ({hasher.algorithm})'))
+        for iterations in options['iterations'] or [configured]:
+            # every user gets a hash made with this iteration count, so logins do not rehash
+            with override_settings(PBKDF2_ITERATIONS=iterations):
+                User.objects.update(password=make_password(PASSWORD))
+                for concurrency in options['concurrency']:
+                    def login(call_index):
+                        response = APIClient().post('/api/token/', {'email': emails[call_index % len(emails)].upper(), 'password': PASSWORD}, format='json')
+                        if response.status_code != 200:
+                            raise RuntimeError(f"login returned {response.status_code}: {response.data}")
+
+                    stats = summarize(*run_concurrently(login, concurrency, options['logins']))
+                    stats.update(iterations=iterations, concurrency=concurrency)
+                    results['login'].append(stats)
+                    self.stdout.write(format_row(f'{iterations} iterations x{concurrency}', stats))
+        return results
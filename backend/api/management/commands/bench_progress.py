@@ -0,0 +1,70 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test.utils import setup_databases, teardown_databases
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.benchmarking import format_header, format_row, run_concurrently, summarize
+from api.models import Lesson, UserProgress
+from api.views import UserProgressView
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Stress-tests the progress endpoint in a throwaway test database: N threads post progress for one user, '
+            'then it checks that no points were lost.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 8, 16])
+        parser.add_argument('--requests', type=int, default=500, help='requests per concurrency level')
+        parser.add_argument('--lessons', type=int, default=5, help='lessons the requests are spread over')
+        parser.add_argument('--json', help='also write the results to this file')
+
+    def handle(self, *args, **options):
+        old_config = setup_databases(options['verbosity'], interactive=False)
+        try:
+            results = self.run(options)
+        finally:
+            connections.close_all()
+            teardown_databases(old_config, options['verbosity'])
+
+        self.stdout.write(self.style.SUCCESS('No lost updates.'))
+        if options['json']:
+            with open(options['json'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['json']}"))
+
+    def run(self, options):
+        factory = APIRequestFactory()
+        view = UserProgressView.as_view()
+        lessons = Lesson.objects.bulk_create([Lesson(sign_name=f'bench {i}', description='', completion_points=3)
+                                              for i in range(options['lessons'])])
+
+        results = []
+        self.stdout.write(f"{connection.vendor} test database {connection.settings_dict['NAME']}")
+        self.stdout.write(format_header('concurrency'))
+        for concurrency in options['concurrency']:
+            user = User.objects.create_user(username=f'bench-{concurrency}', email=f'bench-{concurrency}@example.com')
+
+            def call(call_index):
+                lesson = lessons[call_index % len(lessons)]
+                request = factory.post(f'/api/progress/lesson/{lesson.id}/')
+                force_authenticate(request, user=user)
+                response = view(request, lesson_id=lesson.id)
+                if response.status_code != 200:
+                    raise RuntimeError(f"progress returned {response.status_code}: {response.data}")
+
+            stats = summarize(*run_concurrently(call, concurrency, options['requests']))
+            user.refresh_from_db()
+            expected = options['requests'] * 3
+            progress = UserProgress.objects.filter(user=user).count()
+            stats.update(concurrency=concurrency, total_points=user.total_points, expected_points=expected)
+            results.append(stats)
+            self.stdout.write(format_row(f'x{concurrency}', stats))
+            if user.total_points != expected or progress != len(lessons):
+                raise CommandError(f"lost updates at concurrency {concurrency}: {user.total_points} points "
+                                   f"(expected {expected}), {progress} progress rows (expected {len(lessons)})")
+        return results
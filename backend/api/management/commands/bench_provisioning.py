@@ -0,0 +1,103 @@
+import json
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Max
+from django.test.utils import setup_databases, teardown_databases
+from rest_framework.test import APIRequestFactory
+
+from api.benchmarking import format_header, format_row, summarize
+from api.models import Category, Lesson, UnlockedLesson
+from api.provisioning import backfill_free_lessons, free_lesson_ids, provision_free_lessons
+from api.views import CreateUserView
+
+User = get_user_model()
+
+
+def legacy_provision_free_lessons(user):
+    # the original signal body, kept for comparison
+    for lesson in Lesson.objects.filter(unlock_cost=0):
+        UnlockedLesson.objects.get_or_create(user=user, lesson=lesson)
+
+
+class Command(BaseCommand):
+    help = ('Measures free-lesson provisioning at registration (old get_or_create loop vs bulk insert) and the '
+            'throughput of backfilling a new free lesson for many users, in a throwaway test database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100_000, help='existing users for the backfill')
+        parser.add_argument('--free-lessons', type=int, default=26, help='extra free lessons to create')
+        parser.add_argument('--registrations', type=int, default=200, help='users provisioned per mode')
+        parser.add_argument('--signups', type=int, default=10, help='full registrations through the API (hashes a password each)')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--json', help='also write the results to this file')
+
+    def handle(self, *args, **options):
+        old_config = setup_databases(options['verbosity'], interactive=False)
+        try:
+            results = self.run(options)
+        finally:
+            connections.close_all()
+            teardown_databases(old_config, options['verbosity'])
+
+        if options['json']:
+            with open(options['json'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['json']}"))
+
+    def run(self, options):
+        results = {}
+        last_index = Category.objects.aggregate(Max('order_index'))['order_index__max'] or 0
+        category = Category.objects.create(name='bench-provisioning', description='', order_index=last_index + 1)
+        Lesson.objects.bulk_create([Lesson(category=category, sign_name=f'bench {i}', description='', unlock_cost=0)
+                                    for i in range(options['free_lessons'])])
+        lesson_ids = free_lesson_ids()
+        self.stdout.write(f"{len(lesson_ids)} free lessons")
+
+        # provisioning one new user, the part of registration this changes
+        self.stdout.write(format_header('provisioning'))
+        for mode, provision in (('legacy get_or_create', legacy_provision_free_lessons), ('bulk_create', provision_free_lessons)):
+            users = User.objects.bulk_create([User(username=f'bench-{mode}-{i}', email=f'bench{i}@example.com', password='!')
+                                              for i in range(options['registrations'])])
+            latencies = []
+            start = time.perf_counter()
+            for user in users:
+                call_start = time.perf_counter()
+                provision(user)
+                latencies.append(time.perf_counter() - call_start)
+            stats = summarize(latencies, time.perf_counter() - start)
+            results[f'provision {mode}'] = stats
+            self.stdout.write(format_row(mode, stats))
+
+        # whole registration requests, dominated by password hashing
+        factory = APIRequestFactory()
+        view = CreateUserView.as_view()
+        latencies = []
+        start = time.perf_counter()
+        for i in range(options['signups']):
+            request = factory.post('/api/user/register/', {'username': f'bench-signup-{i}', 'email': f'signup{i}@example.com',
+                                                           'password': 'bench-password', 'left_handed': False}, format='json')
+            call_start = time.perf_counter()
+            response = view(request)
+            latencies.append(time.perf_counter() - call_start)
+            if response.status_code != 201:
+                raise RuntimeError(f"register returned {response.status_code}: {response.data}")
+        stats = summarize(latencies, time.perf_counter() - start)
+        results['registration'] = stats
+        self.stdout.write(format_row('registration (API)', stats))
+
+        # backfilling one new free lesson for every user
+        existing = User.objects.count()
+        missing = max(0, options['users'] - existing)
+        for offset in range(0, missing, 10_000):
+            User.objects.bulk_create([User(username=f'bench-backfill-{i}', email=f'backfill{i}@example.com', password='!')
+                                      for i in range(offset, min(missing, offset + 10_000))])
+        new_lesson = Lesson.objects.create(category=category, sign_name='bench new', description='', unlock_cost=0)
+        start = time.perf_counter()
+        users, rows = backfill_free_lessons([new_lesson.id], options['chunk_size'])
+        elapsed = time.perf_counter() - start
+        results['backfill'] = {'users': users, 'seconds': elapsed, 'users_per_second': users / elapsed}
+        self.stdout.write(f"backfill: {users} users in {elapsed:.2f}s ({users / elapsed:.0f} users/s)")
+        return results
@@ -0,0 +1,197 @@
+import json
+import random
+import subprocess
+import threading
+import time
+from datetime import datetime, timezone
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_databases, teardown_databases
+from rest_framework.test import APIClient
+
+from api import catalog, leaderboard
+from api.benchmarking import format_header, format_row, run_concurrently, summarize
+from api.models import Category, Lesson, UnlockedLesson, UserProgress
+from api.provisioning import backfill_free_lessons
+
+User = get_user_model()
+
+PASSWORD = 'load-test-password'
+
+# Locust style task mix: every call picks one of these at random, weighted.
+# Each task takes (client, state, rng) and returns the response.
+TASKS = {
+    'GET profile': (10, lambda client, state, rng: client.get('/api/user/profile/')),
+    'GET lessons': (10, lambda client, state, rng: client.get('/api/lessons/')),
+    'GET lessons?category_name': (5, lambda client, state, rng: client.get(f"/api/lessons/?category_name={rng.choice(state['categories'])}")),
+    'GET progress': (5, lambda client, state, rng: client.get('/api/user/progress/')),
+    'GET unlocked': (5, lambda client, state, rng: client.get('/api/unlocked-lessons/')),
+    'GET dashboard': (5, lambda client, state, rng: client.get('/api/dashboard/?category_name=fingerspelling')),
+    'POST progress': (5, lambda client, state, rng: client.post(f"/api/progress/lesson/{rng.choice(state['lessons'])}/")),
+    'POST unlock': (2, lambda client, state, rng: client.post(f"/api/lessons/{rng.choice(state['paid_lessons'])}/unlock/")),
+    'POST token': (1, lambda client, state, rng: login(client, state['email'])),
+}
+
+
+def login(client, email):
+    client.credentials()
+    response = client.post('/api/token/', {'email': email, 'password': PASSWORD}, format='json')
+    if response.status_code == 200:
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+    return response
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = ('Load-tests the API: seeds a throwaway test database (like `manage.py test`, the real one is never touched) '
+            'with synthetic users, lessons, progress and unlocks, drives the endpoints with concurrent clients '
+            'through the full middleware/auth stack, and reports throughput and p50/p95/p99 per endpoint.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=5)
+        parser.add_argument('--lessons', type=int, default=200, help='lessons in total, about a third of them free')
+        parser.add_argument('--progress-per-user', type=int, default=20)
+        parser.add_argument('--unlocks-per-user', type=int, default=5, help='paid lessons unlocked per user, on top of the free ones')
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+        parser.add_argument('--requests', type=int, default=2000, help='requests per concurrency level')
+        parser.add_argument('--task', action='append', choices=list(TASKS), help='only run these tasks (repeatable)')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--keepdb', action='store_true', help='keep the seeded test database for the next run')
+        parser.add_argument('--json', help='write the results to this file')
+        parser.add_argument('--compare', help='results file of an earlier run to compare against')
+
+    def handle(self, *args, **options):
+        verbosity = options['verbosity']
+        old_config = setup_databases(verbosity, interactive=False, keepdb=options['keepdb'])
+        try:
+            self.stdout.write(f"{connection.vendor} test database {connection.settings_dict['NAME']}")
+            state = self.seed(options)
+            results = self.run(state, options)
+        finally:
+            teardown_databases(old_config, verbosity, keepdb=options['keepdb'])
+
+        if options['json']:
+            with open(options['json'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['json']}"))
+        if options['compare']:
+            with open(options['compare']) as f:
+                self.compare(json.load(f), results)
+
+    def seed(self, options):
+        rng = random.Random(options['seed'])
+        if User.objects.filter(username__startswith='load-').exists():
+            self.stdout.write("Reusing the seeded data of an earlier --keepdb run")
+        else:
+            start = time.perf_counter()
+            categories = Category.objects.bulk_create(
+                [Category(name='fingerspelling', description='', order_index=0)] +
+                [Category(name=f'load category {i}', description='', order_index=i) for i in range(1, options['categories'])])
+            Lesson.objects.bulk_create([
+                Lesson(category=categories[i % len(categories)], sign_name=f'load sign {i}', description='',
+                       unlock_cost=0 if i % 3 == 0 else 100, completion_points=50)
+                for i in range(options['lessons'])
+            ])
+            lesson_ids = list(Lesson.objects.values_list('id', flat=True))
+            paid_ids = list(Lesson.objects.exclude(unlock_cost=0).values_list('id', flat=True))
+
+            password = make_password(PASSWORD) # hashed once, every user shares it
+            for offset in range(0, options['users'], 5000):
+                User.objects.bulk_create([
+                    User(username=f'load-{i}', email=f'load{i}@example.com', password=password,
+                         total_points=rng.randrange(0, 200) * 50)
+                    for i in range(offset, min(options['users'], offset + 5000))
+                ])
+            backfill_free_lessons()
+            for offset in range(0, options['users'], 1000):
+                user_ids = User.objects.filter(username__startswith='load-').order_by('pk').values_list('pk', flat=True)[offset:offset + 1000]
+                progress, unlocks = [], []
+                for user_id in user_ids:
+                    for lesson_id in rng.sample(lesson_ids, min(options['progress_per_user'], len(lesson_ids))):
+                        progress.append(UserProgress(user_id=user_id, lesson_id=lesson_id))
+                    for lesson_id in rng.sample(paid_ids, min(options['unlocks_per_user'], len(paid_ids))):
+                        unlocks.append(UnlockedLesson(user_id=user_id, lesson_id=lesson_id))
+                UserProgress.objects.bulk_create(progress, batch_size=5000)
+                UnlockedLesson.objects.bulk_create(unlocks, batch_size=5000, ignore_conflicts=True)
+            leaderboard.rebuild()
+            self.stdout.write(f"Seeded {User.objects.count()} users, {len(lesson_ids)} lessons, "
+                              f"{UserProgress.objects.count()} progress and {UnlockedLesson.objects.count()} unlocks "
+                              f"in {time.perf_counter() - start:.1f}s")
+        catalog.clear()
+
+        return {
+            'categories': list(Category.objects.values_list('name', flat=True)),
+            'lessons': list(Lesson.objects.values_list('id', flat=True)),
+            'paid_lessons': list(Lesson.objects.exclude(unlock_cost=0).values_list('id', flat=True)),
+            'emails': list(User.objects.filter(username__startswith='load-').values_list('email', flat=True)),
+        }
+
+    def run(self, state, options):
+        task_names = options['task'] or list(TASKS)
+        weights = [TASKS[name][0] for name in task_names]
+        results = {
+            'commit': git_commit(),
+            'started_at': datetime.now(timezone.utc).isoformat(),
+            'database': connection.vendor,
+            'scale': {key: options[key] for key in ('users', 'categories', 'lessons', 'progress_per_user', 'unlocks_per_user')},
+            'runs': [],
+        }
+
+        for concurrency in options['concurrency']:
+            local = threading.local()
+            latencies = {name: [] for name in task_names}
+            latencies_lock = threading.Lock()
+            errors = []
+
+            def call(call_index):
+                # one logged-in client per thread, each thread plays another seeded user
+                if not hasattr(local, 'client'):
+                    local.rng = random.Random(options['seed'] * 1000 + call_index)
+                    local.state = dict(state, email=local.rng.choice(state['emails']))
+                    local.client = APIClient()
+                    login(local.client, local.state['email'])
+                name = local.rng.choices(task_names, weights)[0]
+                start = time.perf_counter()
+                response = TASKS[name][1](local.client, local.state, local.rng)
+                elapsed = time.perf_counter() - start
+                with latencies_lock:
+                    latencies[name].append(elapsed)
+                    if response.status_code >= 400 and not (name == 'POST unlock' and response.status_code == 400):
+                        errors.append(f"{name}: {response.status_code}")
+
+            all_latencies, elapsed = run_concurrently(call, concurrency, options['requests'])
+            run = {'concurrency': concurrency, 'errors': len(errors), 'overall': summarize(all_latencies, elapsed), 'endpoints': {}}
+            self.stdout.write(f"\nconcurrency {concurrency}" + (f", {len(errors)} errors (first: {errors[0]})" if errors else ""))
+            self.stdout.write(format_header('endpoint'))
+            for name in task_names:
+                if latencies[name]:
+                    # throughput per endpoint is its share of the whole run
+                    run['endpoints'][name] = summarize(latencies[name], elapsed)
+                    self.stdout.write(format_row(name, run['endpoints'][name]))
+            self.stdout.write(format_row('all', run['overall']))
+            results['runs'].append(run)
+        return results
+
+    def compare(self, before, after):
+        self.stdout.write(f"\nCompared with {before.get('commit')} ({before.get('started_at')}), p50 / p95 ms, + is slower:")
+        runs_before = {run['concurrency']: run for run in before['runs']}
+        for run in after['runs']:
+            previous = runs_before.get(run['concurrency'])
+            if not previous:
+                continue
+            self.stdout.write(f"concurrency {run['concurrency']}")
+            for name, stats in list(run['endpoints'].items()) + [('all', run['overall'])]:
+                old = previous['overall'] if name == 'all' else previous['endpoints'].get(name)
+                if old:
+                    self.stdout.write(f"  {name:<28} {stats['p50_ms']:>8.2f} ({stats['p50_ms'] - old['p50_ms']:+.2f})"
+                                      f" {stats['p95_ms']:>8.2f} ({stats['p95_ms'] - old['p95_ms']:+.2f})")
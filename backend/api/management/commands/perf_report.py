@@ -0,0 +1,64 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api import instrumentation
+
+
+class Command(BaseCommand):
+    help = ('Prints the per-endpoint cost recorded by PerfMiddleware (PERF_INSTRUMENTATION=1), merged over '
+            'every process that wrote to the dump directory, most expensive endpoint first.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', default=settings.PERF_INSTRUMENTATION['DUMP_DIR'])
+        parser.add_argument('--sort', choices=['total', 'mean', 'p95', 'queries', 'requests'], default='total')
+        parser.add_argument('--json', help='also write the merged numbers to this file')
+        parser.add_argument('--reset', action='store_true', help='delete the dumps after reporting')
+
+    def handle(self, *args, **options):
+        merged = instrumentation.merge(instrumentation.load_dumps(options['dir']))
+        if not merged:
+            self.stdout.write(f"No measurements in {options['dir']}. Run the server with PERF_INSTRUMENTATION=1.")
+            return
+
+        rows = []
+        for endpoint, entry in merged.items():
+            requests = entry['requests']
+            rows.append({
+                'endpoint': endpoint,
+                'requests': requests,
+                'errors': entry['errors'],
+                'total_s': entry['total_ms'] / 1000,
+                'mean_ms': entry['total_ms'] / requests,
+                'p50_ms': instrumentation.histogram_percentile(entry['histogram'], 50, entry['max_ms']),
+                'p95_ms': instrumentation.histogram_percentile(entry['histogram'], 95, entry['max_ms']),
+                'max_ms': entry['max_ms'],
+                'queries': entry['queries'] / requests,
+                'max_queries': entry['max_queries'],
+                'sql_ms': entry['sql_ms'] / requests,
+                'duplicates': entry['duplicates'] / requests,
+                'similar': entry['similar'] / requests,
+                'kb': entry['bytes'] / requests / 1024,
+            })
+        sort_key = {'total': 'total_s', 'mean': 'mean_ms', 'p95': 'p95_ms', 'queries': 'queries', 'requests': 'requests'}
+        rows.sort(key=lambda row: row[sort_key[options['sort']]], reverse=True)
+
+        # percentiles come from the histogram, so they are bucket upper bounds
+        self.stdout.write(f"{'endpoint':<44} {'reqs':>7} {'total s':>8} {'mean ms':>8} {'p50<=':>6} {'p95<=':>6} "
+                          f"{'max ms':>8} {'queries':>8} {'sql ms':>7} {'repeat':>6} {'similar':>7} {'KB':>7}")
+        for row in rows:
+            self.stdout.write(
+                f"{row['endpoint']:<44} {row['requests']:>7} {row['total_s']:>8.2f} {row['mean_ms']:>8.2f} "
+                f"{row['p50_ms']:>6g} {row['p95_ms']:>6g} {row['max_ms']:>8.1f} {row['queries']:>8.1f} "
+                f"{row['sql_ms']:>7.2f} {row['duplicates']:>6.1f} {row['similar']:>7.1f} {row['kb']:>7.1f}")
+
+        if options['json']:
+            with open(options['json'], 'w') as f:
+                json.dump(rows, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['json']}"))
+        if options['reset']:
+            for name in os.listdir(options['dir']):
+                if name.startswith('perf-') and name.endswith('.json'):
+                    os.remove(os.path.join(options['dir'], name))
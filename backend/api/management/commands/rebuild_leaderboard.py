@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from api import leaderboard
+from api.models import LeaderboardBucket
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the leaderboard buckets from the users\' total_points, after points were changed outside the API.'
+
+    def handle(self, *args, **options):
+        leaderboard.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Leaderboard rebuilt: {LeaderboardBucket.objects.count()} distinct point totals."))
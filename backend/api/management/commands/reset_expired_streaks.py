@@ -0,0 +1,20 @@
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Resets the streak of every user who has not practiced since before yesterday, in one UPDATE. '
+            'Meant to run nightly, reads already ignore expired streaks (User.effective_streak).')
+
+    def handle(self, *args, **options):
+        yesterday = date.today() - timedelta(days=1)
+        reset = User.objects.filter(
+            Q(last_streak_date__lt=yesterday) | Q(last_streak_date__isnull=True),
+            current_streak__gt=0,
+        ).update(current_streak=0)
+        self.stdout.write(self.style.SUCCESS(f"Reset {reset} expired streaks."))
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.23 on 2026-10-18 09:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_user_left_handed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WordOfTheDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('word', models.CharField(max_length=100)),
+                ('date', models.DateField(auto_now_add=True, unique=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.23 on 2026-10-18 09:33
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_leaderboard(apps, schema_editor):
+    User = apps.get_model('api', 'User')
+    LeaderboardBucket = apps.get_model('api', 'LeaderboardBucket')
+    totals = User.objects.filter(total_points__gt=0).values('total_points').annotate(users=Count('id'))
+    LeaderboardBucket.objects.bulk_create([LeaderboardBucket(points=row['total_points'], users=row['users']) for row in totals])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_wordoftheday'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('points', models.IntegerField(unique=True)),
+                ('users', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['-total_points', 'id'], name='user_points_rank_idx'),
+        ),
+        migrations.RunPython(fill_leaderboard, migrations.RunPython.noop),
+    ]
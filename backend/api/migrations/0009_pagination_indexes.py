@@ -0,0 +1,21 @@
+# Generated by Django 4.2.23 on 2026-10-18 09:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_leaderboard'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='unlockedlesson',
+            index=models.Index(fields=['user', '-unlocked_at', '-id'], name='unlocked_user_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userprogress',
+            index=models.Index(fields=['user', '-last_practiced_at', '-id'], name='progress_user_recent_idx'),
+        ),
+    ]
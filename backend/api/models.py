@@ -1,5 +1,9 @@
+from datetime import date
+
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth.models import AbstractUser
+from rest_framework.exceptions import AuthenticationFailed
 
 class User(AbstractUser):
     # Usage: from django.contrib.auth import get_user_model, then set User = get_user_model()
@@ -11,9 +15,64 @@ class User(AbstractUser):
     created_at = models.DateTimeField(auto_now_add=True)
     left_handed = models.BooleanField(default=False)
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # leaderboard order (api/leaderboard.py): highest points first, earliest account first on ties
+            models.Index(fields=['-total_points', 'id'], name='user_points_rank_idx'),
+            # login looks users up by LOWER(email) (MyTokenObtainPairSerializer)
+            models.Index(Lower('email'), name='user_email_lower_idx'),
+        ]
+
     def __str__(self):
         return self.username
 
+    def effective_streak(self, today=None):
+        # The stored streak is only reset by `manage.py reset_expired_streaks`, so reads work out whether it
+        # is still running: it is lost once a whole day has passed without practice.
+        today = today or date.today()
+        if self.last_streak_date and (today - self.last_streak_date).days <= 1:
+            return self.current_streak
+        return 0
+
+class TokenUser(User):
+    # The user of an authenticated API request (api/authentication.py), built from the claims of the access
+    # token without a query. Only the claim fields are loaded; reading any other field loads the whole row once,
+    # so views that only filter by the user, like the unlocked lessons list, never fetch it.
+    # The claims are as old as the token: views that return or save user data call load() first, a full save()
+    # of a user that was not loaded would write the token's stale username and left_handed back over the row.
+    # If the user was deleted since the token was issued, loading fails with AuthenticationFailed (401).
+    CLAIM_FIELDS = ('id', 'username', 'left_handed')
+    loaded = False
+
+    class Meta:
+        proxy = True
+
+    @classmethod
+    def from_claims(cls, user_id, claims):
+        values = dict(claims, id=user_id)
+        field_names = [f.attname for f in cls._meta.concrete_fields if f.attname in cls.CLAIM_FIELDS]
+        return cls.from_db(None, field_names, [values[name] for name in field_names])
+
+    def refresh_from_db(self, using=None, fields=None):
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred and set(fields) <= deferred:
+            fields = deferred # one query for the whole row instead of one per field
+        try:
+            super().refresh_from_db(using, fields)
+        except User.DoesNotExist:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+
+    def load(self):
+        """Loads every field from the database, including the claim fields, and returns the user."""
+        self.refresh_from_db(fields=[f.attname for f in self._meta.concrete_fields])
+        self.loaded = True
+        return self
+
+    def save(self, *args, **kwargs):
+        if not self.loaded and kwargs.get('update_fields') is None:
+            raise ValueError("TokenUser.save() would write the token's claims back, call load() first or pass update_fields")
+        super().save(*args, **kwargs)
+
 class Category(models.Model):
     name = models.CharField(max_length=128, unique=True)
     description = models.TextField() 
@@ -43,6 +102,10 @@ class UserProgress(models.Model):
     class Meta:
         # Ensures a user can only have one progress entry per lesson
         unique_together = ('user', 'lesson')
+        indexes = [
+            # a user's history, most recent first (ProgressPagination)
+            models.Index(fields=['user', '-last_practiced_at', '-id'], name='progress_user_recent_idx'),
+        ]
 
 class UnlockedLesson(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="unlocked_lessons")
@@ -51,10 +114,24 @@ class UnlockedLesson(models.Model):
 
     class Meta:
         unique_together = ('user', 'lesson')
+        indexes = [
+            # a user's unlocked lessons, most recent first (UnlockedLessonPagination)
+            models.Index(fields=['user', '-unlocked_at', '-id'], name='unlocked_user_recent_idx'),
+        ]
 
 class WordOfTheDay(models.Model):
     word = models.CharField(max_length=100)
     date = models.DateField(auto_now_add=True, unique=True)
 
     def __str__(self):
-        return self.word
\ No newline at end of file
+        return self.word
+
+class LeaderboardBucket(models.Model):
+    # How many users have exactly `points` points, for every total above 0. A user's rank is one more than the
+    # users in the buckets above theirs, so it is a sum over the distinct point totals instead of a count over
+    # all users. Kept up to date by api/leaderboard.py, rebuilt from scratch by `manage.py rebuild_leaderboard`.
+    points = models.IntegerField(unique=True)
+    users = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.points} points: {self.users} users"
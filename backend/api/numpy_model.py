@@ -0,0 +1,70 @@
+import numpy as np
+
+# The inference half of ml-pipeline/numpy_model.py: loads a .npz export of the alphabet MLP and runs
+# its forward pass with NumPy only. It has no Django imports, so ml-pipeline imports it from here
+# (its export and check commands write and verify the .npz files this reads).
+
+
+def relu(x):
+    return np.maximum(x, 0, out=x)
+
+
+def softmax(x):
+    x -= x.max(axis=1, keepdims=True)
+    np.exp(x, out=x)
+    x /= x.sum(axis=1, keepdims=True)
+    return x
+
+
+ACTIVATIONS = {"linear": lambda x: x, "relu": relu, "softmax": softmax}
+
+
+class NumpyMLP:
+    """Forward pass of the exported MLP: x @ kernel + bias and the layer's activation, layer by layer."""
+
+    def __init__(self, layers, classes=None, quantization="float32"):
+        self.layers = [(np.ascontiguousarray(kernel, dtype=np.float32), np.asarray(bias, dtype=np.float32), activation)
+                       for kernel, bias, activation in layers]
+        self.classes = classes
+        self.quantization = quantization
+
+    @classmethod
+    def load(cls, npz_path):
+        with np.load(npz_path) as data:
+            quantization = str(data["quantization"])
+            layers = []
+            for i, activation in enumerate(data["activations"]):
+                kernel = data[f"kernel_{i}"].astype(np.float32)
+                if quantization == "int8":
+                    kernel *= data[f"kernel_scale_{i}"]
+                layers.append((kernel, data[f"bias_{i}"], str(activation)))
+            classes = data["classes"].tolist() if "classes" in data else None
+        return cls(layers, classes, quantization)
+
+    @property
+    def num_inputs(self):
+        return self.layers[0][0].shape[0]
+
+    @property
+    def num_classes(self):
+        return self.layers[-1][0].shape[1]
+
+    def predict(self, x, batch_size=None):
+        """Class probabilities for a (N, inputs) batch, optionally computed batch_size rows at a time."""
+        x = np.asarray(x, dtype=np.float32)
+        if x.ndim != 2 or x.shape[1] != self.num_inputs:
+            raise ValueError(f"expected input of shape (N, {self.num_inputs}), got {x.shape}")
+        if batch_size is None or len(x) <= batch_size:
+            return self._forward(x)
+
+        out = np.empty((len(x), self.num_classes), dtype=np.float32)
+        for start in range(0, len(x), batch_size):
+            out[start:start + batch_size] = self._forward(x[start:start + batch_size])
+        return out
+
+    def _forward(self, h):
+        for kernel, bias, activation in self.layers:
+            h = h @ kernel
+            h += bias
+            h = ACTIVATIONS[activation](h)
+        return h
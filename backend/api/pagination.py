@@ -0,0 +1,32 @@
+from rest_framework.pagination import CursorPagination
+
+# Cursor pagination for the list endpoints that grow with the catalog or a user's history.
+# It is opt in: a request with neither ?cursor= nor ?page_size= still gets the whole list as a plain array,
+# which is what the frontend expects. Paginated responses are {"next", "previous", "results"}, where next and
+# previous are links carrying the cursor. Unlike page numbers, a cursor page costs the same at any depth
+# (an indexed range scan, no OFFSET) and rows added while paging are neither skipped nor repeated.
+
+
+class OptInCursorPagination(CursorPagination):
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param not in request.query_params and self.page_size_query_param not in request.query_params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+
+class ProgressPagination(OptInCursorPagination):
+    # most recently practiced first, matches the (user, -last_practiced_at, -id) index
+    ordering = ('-last_practiced_at', '-id')
+
+
+class UnlockedLessonPagination(OptInCursorPagination):
+    # most recently unlocked first, matches the (user, -unlocked_at, -id) index
+    ordering = ('-unlocked_at', '-id')
+
+
+class LessonPagination(OptInCursorPagination):
+    ordering = ('id',)
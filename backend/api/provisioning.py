@@ -0,0 +1,50 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from .models import Lesson, UnlockedLesson
+
+# Unlocking the free lessons (unlock_cost=0) for users: for one new user at registration (see signals.py) and
+# for every existing user after a free lesson was added (manage.py backfill_free_lessons).
+# Both insert with bulk_create(ignore_conflicts=True), rows that already exist are skipped by the database.
+
+User = get_user_model()
+
+
+def free_lesson_ids():
+    return list(Lesson.objects.filter(unlock_cost=0).values_list('id', flat=True))
+
+
+def provision_free_lessons(user, lesson_ids=None):
+    """Unlocks the free lessons for one user, in two queries whatever the number of lessons."""
+    if lesson_ids is None:
+        lesson_ids = free_lesson_ids()
+    UnlockedLesson.objects.bulk_create(
+        [UnlockedLesson(user=user, lesson_id=lesson_id) for lesson_id in lesson_ids],
+        ignore_conflicts=True,
+    )
+
+
+def backfill_free_lessons(lesson_ids=None, chunk_size=1000, batch_size=5000, progress=None):
+    """Unlocks the given (by default all) free lessons for every existing user.
+
+    Users are walked in primary key order, chunk_size at a time, each chunk in its own transaction so a
+    long backfill never holds one big write lock. progress(users_done, rows_sent) is called after each chunk.
+    Returns (users, rows sent), rows already unlocked are sent but not inserted.
+    """
+    if lesson_ids is None:
+        lesson_ids = free_lesson_ids()
+    users = rows = 0
+    last_pk = 0
+    while lesson_ids:
+        user_ids = list(User.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:chunk_size])
+        if not user_ids:
+            break
+        unlocked = [UnlockedLesson(user_id=user_id, lesson_id=lesson_id) for user_id in user_ids for lesson_id in lesson_ids]
+        with transaction.atomic():
+            UnlockedLesson.objects.bulk_create(unlocked, batch_size=batch_size, ignore_conflicts=True)
+        users += len(user_ids)
+        rows += len(unlocked)
+        last_pk = user_ids[-1]
+        if progress:
+            progress(users, rows)
+    return users, rows
@@ -1,12 +1,34 @@
 from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.db.models import Value
+from django.db.models.functions import Lower
+import numpy as np
 from rest_framework import serializers
 from .models import Category, Lesson, UserProgress, UnlockedLesson, WordOfTheDay
+from .classifier import NUM_COORDS
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
 User = get_user_model()
 
 # model serializer auto genearate field based on model, handles validations and can be used to create or update
 
+def requested_fields(request):
+    # the ?fields=a,b sparse fieldset of a request, or None for every field
+    value = request.query_params.get('fields') if request is not None else None
+    if not value:
+        return None
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+class SparseFieldsMixin:
+    # Lets a list endpoint return only some fields, e.g. /api/user/progress/?fields=lesson_id,last_practiced_at
+    # to leave out the nested lesson. Unknown names are ignored, without ?fields= nothing changes.
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = requested_fields(self.context.get('request'))
+        if fields is not None:
+            for name in set(self.fields) - fields:
+                self.fields.pop(name)
+
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
     # Customizes the JWT token creation process to allow login with email. Overriding default fields to accept email instead of username
     email = serializers.EmailField(required=True)
@@ -16,14 +38,22 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
         super().__init__(*args, **kwargs)
         self.fields.pop('username', None)
 
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        # lets TokenUserAuthentication build the request user without a query, see api/authentication.py
+        token['username'] = user.username
+        token['left_handed'] = user.left_handed
+        return token
+
 
     def validate(self, attrs):
         email = attrs.get("email")
         password = attrs.get("password")
 
         try:
-            # Find the user by their email address (case-insensitive)
-            user = User.objects.get(email__iexact=email)
+            # Find the user by their email address (case-insensitive), through the LOWER(email) index
+            user = User.objects.alias(email_lower=Lower('email')).get(email_lower=Lower(Value(email)))
         except User.DoesNotExist:
             raise serializers.ValidationError("No active account found with the given credentials")
         if not user.check_password(password):
@@ -57,6 +87,9 @@ class UserSerializer(serializers.ModelSerializer):
 
 # GET user information
 class UserProfileSerializer(serializers.ModelSerializer):
+    # the streak as of today, whether or not the nightly reset has run yet
+    current_streak = serializers.IntegerField(source='effective_streak', read_only=True)
+
     class Meta:
         model = User
         fields = [
@@ -78,7 +111,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
             "date_joined"
         ]
 
-class LessonSerializer(serializers.ModelSerializer):
+class LessonSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     # show the category's name to make the API more readable
     category_name = serializers.CharField(source='category.name', read_only=True)
 
@@ -103,13 +136,15 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ["id", "name", "description", "order_index", "lessons"]
 
 # view only for user progress
-class UserProgressSerializer(serializers.ModelSerializer):
+class UserProgressSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     # Nesting the full lesson details provides a rich response.
     lesson = LessonSerializer(read_only=True)
-    
+    # just the id, for clients that leave out the nested lesson with ?fields=
+    lesson_id = serializers.IntegerField(read_only=True)
+
     class Meta:
         model = UserProgress
-        fields = ["id","user", "lesson", "last_practiced_at"]
+        fields = ["id","user", "lesson", "lesson_id", "last_practiced_at"]
         extra_kwargs = {"user":{"read_only":True},"lesson":{"read_only":True},"last_practiced_at":{"read_only":True}} # not allow user to select which user saved the progress
 
 class ChangePasswordSerializer(serializers.Serializer):
@@ -117,7 +152,7 @@ class ChangePasswordSerializer(serializers.Serializer):
     new_password = serializers.CharField(required=True)
 
     def validate_old_password(self, value):
-        user = self.context['request'].user
+        user = self.instance or self.context['request'].user
         if not user.check_password(value):
             raise serializers.ValidationError("Your old password was entered incorrectly. Please enter it again.")
         return value
@@ -129,17 +164,18 @@ class ChangePasswordSerializer(serializers.Serializer):
 
     def save(self, **kwargs):
         password = self.validated_data['new_password']
-        user = self.context['request'].user
+        user = self.instance or self.context['request'].user
         user.set_password(password)
-        user.save()
+        user.save(update_fields=['password'])
         return user
 
     
-class UnlockedLessonSerializer(serializers.ModelSerializer):
+class UnlockedLessonSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     #  see the full lesson details, not just the ID.
     lesson = LessonSerializer(read_only=True)
-    # When writing (creating),  only need the client to send us the lesson's ID.
-    lesson_id = serializers.IntegerField(write_only=True)
+    # When writing (creating),  only need the client to send us the lesson's ID. Also returned, for clients
+    # that leave out the nested lesson with ?fields=
+    lesson_id = serializers.IntegerField()
 
     class Meta:
         model = UnlockedLesson
@@ -150,4 +186,25 @@ class UnlockedLessonSerializer(serializers.ModelSerializer):
 class WordOfTheDaySerializer(serializers.ModelSerializer):
     class Meta:
         model = WordOfTheDay
-        fields = ["word","date"]
\ No newline at end of file
+        fields = ["word","date"]
+
+# POST input for server side sign classification
+class ClassifyLandmarksSerializer(serializers.Serializer):
+    # one normalized vector of 42 floats, or a list of them
+    landmarks = serializers.JSONField()
+
+    def validate_landmarks(self, value):
+        # parsed in one go by numpy instead of one FloatField per coordinate
+        try:
+            landmarks = np.asarray(value, dtype=np.float32)
+        except (TypeError, ValueError):
+            raise serializers.ValidationError("Landmarks must be numbers.")
+        if landmarks.ndim == 1:
+            landmarks = landmarks[None]
+        if landmarks.ndim != 2 or landmarks.shape[1] != NUM_COORDS or len(landmarks) == 0:
+            raise serializers.ValidationError(f"Expected one or more vectors of {NUM_COORDS} normalized coordinates.")
+        if len(landmarks) > settings.SIGN_CLASSIFIER["MAX_VECTORS_PER_REQUEST"]:
+            raise serializers.ValidationError(f"At most {settings.SIGN_CLASSIFIER['MAX_VECTORS_PER_REQUEST']} vectors per request.")
+        if not np.isfinite(landmarks).all():
+            raise serializers.ValidationError("Landmarks must be finite numbers.")
+        return landmarks
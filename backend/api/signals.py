@@ -1,7 +1,12 @@
-from django.db.models.signals import post_save
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from .models import Lesson, UnlockedLesson
+from . import catalog, leaderboard
+from .models import Category, Lesson
+from .provisioning import provision_free_lessons
 
 User = get_user_model()
 
@@ -12,7 +17,29 @@ def unlock_free_lessons_for_new_user(sender, instance, created, **kwargs):
     If the user was just created, it unlocks all lessons without unlock cost.
     """
     if created: # Only run this logic if a new user was just created
-        free_lessons = Lesson.objects.filter(unlock_cost=0)
-        for lesson in free_lessons:
-            # Create the unlocked lesson record for the new user
-            UnlockedLesson.objects.get_or_create(user=instance, lesson=lesson)
\ No newline at end of file
+        # one bulk insert for all free lessons instead of a get_or_create per lesson
+        provision_free_lessons(instance)
+
+@receiver(post_delete, sender=User)
+def remove_deleted_user_from_leaderboard(sender, instance, **kwargs):
+    leaderboard.remove_user(instance.total_points)
+
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Lesson)
+def invalidate_catalog(sender, **kwargs):
+    """
+    Any change to a category or lesson starts a new catalog version, which invalidates the cached catalog.
+    The version only moves once the change is committed, so no request can cache the old rows under the new version.
+    """
+    transaction.on_commit(catalog.bump_version)
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """
+    Sets settings.SQLITE_PRAGMAS on every new SQLite connection. Most of them only last as long as the connection,
+    but journal_mode is stored in the database file and stays in effect for every later connection.
+    """
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            for pragma, value in settings.SQLITE_PRAGMAS.items():
+                cursor.execute(f"PRAGMA {pragma} = {value}")
@@ -1,3 +1,657 @@
-from django.test import TestCase
+import importlib.util
+import os
+import tempfile
+import threading
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import get_hasher
+from django.core.cache import cache
+from django.core.cache.backends.base import memcache_key_warnings
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import catalog, classifier, instrumentation, leaderboard
+from .benchmarking import run_concurrently
+from .models import Category, LeaderboardBucket, Lesson, TokenUser, UnlockedLesson, UserProgress
+from .provisioning import provision_free_lessons
+
+User = get_user_model()
+
+
+class ListEndpointQueryCountTests(APITestCase):
+    # The list endpoints must use a fixed number of queries however many rows they return
+
+    def setUp(self):
+        catalog.clear()
+        self.user = User.objects.create_user(username="learner", email="learner@example.com", password="pass12345")
+        self.client.force_authenticate(self.user)
+        self.categories = [
+            Category.objects.create(name=name, description=name, order_index=i)
+            for i, name in enumerate(["fingerspelling", "greetings", "numbers"])
+        ]
+
+    def add_lessons(self, count):
+        for _ in range(count):
+            category = self.categories[Lesson.objects.count() % len(self.categories)]
+            lesson = Lesson.objects.create(category=category, sign_name=f"sign {Lesson.objects.count()}", description="", unlock_cost=0)
+            UserProgress.objects.create(user=self.user, lesson=lesson)
+            UnlockedLesson.objects.get_or_create(user=self.user, lesson=lesson)
+
+    def assertConstantQueries(self, url, num_queries):
+        # counts the queries of a catalog cache miss
+        self.add_lessons(2)
+        catalog.clear()
+        with self.assertNumQueries(num_queries):
+            small = self.client.get(url)
+        self.add_lessons(20)
+        catalog.clear()
+        with self.assertNumQueries(num_queries):
+            large = self.client.get(url)
+        self.assertEqual(small.status_code, status.HTTP_200_OK)
+        self.assertEqual(large.status_code, status.HTTP_200_OK)
+
+    def test_lessons(self):
+        self.assertConstantQueries(reverse("lesson-list"), 1)
+
+    def test_lessons_filtered_by_category(self):
+        self.assertConstantQueries(reverse("lesson-list") + "?category_name=Fingerspelling", 1)
+
+    def test_categories(self):
+        self.assertConstantQueries(reverse("category-list"), 2)
+
+    def test_user_progress(self):
+        self.assertConstantQueries(reverse("user-progress-list"), 1)
+
+    def test_unlocked_lessons(self):
+        self.assertConstantQueries(reverse("saved-lessons"), 1)
+
+    def test_dashboard(self):
+        self.assertConstantQueries(reverse("dashboard"), 4)
+
+    def test_dashboard_for_a_category(self):
+        self.assertConstantQueries(reverse("dashboard") + "?category_name=Fingerspelling", 4)
+
+
+class CursorPaginationTests(APITestCase):
+    def setUp(self):
+        catalog.clear()
+        self.user = User.objects.create_user(username="pager", email="pager@example.com", password="pass12345")
+        self.client.force_authenticate(self.user)
+        for i in range(25):
+            lesson = Lesson.objects.create(sign_name=f"sign {i}", description="", unlock_cost=0)
+            UserProgress.objects.create(user=self.user, lesson=lesson)
+            UnlockedLesson.objects.create(user=self.user, lesson=lesson)
+
+    def walk(self, url):
+        pages = []
+        while url:
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages.append(response.data["results"])
+            url = response.data["next"]
+        return pages
+
+    def test_progress_pages_cover_the_history_newest_first(self):
+        pages = self.walk(reverse("user-progress-list") + "?page_size=10")
+
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        ids = [record["id"] for page in pages for record in page]
+        self.assertEqual(ids, list(UserProgress.objects.order_by("-last_practiced_at", "-id").values_list("id", flat=True)))
+
+    def test_unlocked_and_lesson_pages(self):
+        self.assertEqual(sum(map(len, self.walk(reverse("saved-lessons") + "?page_size=7"))), 25)
+        self.assertEqual(sum(map(len, self.walk(reverse("lesson-list") + "?page_size=7"))), 25)
+
+    def test_without_page_parameters_the_whole_list_is_returned(self):
+        response = self.client.get(reverse("user-progress-list"))
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 25)
+
+    def test_sparse_fields_drop_the_nested_lesson(self):
+        response = self.client.get(reverse("user-progress-list") + "?fields=lesson_id,last_practiced_at")
+
+        self.assertEqual(set(response.data[0]), {"lesson_id", "last_practiced_at"})
+
+    def test_sparse_fields_skip_the_join(self):
+        with self.assertNumQueries(1) as queries:
+            self.client.get(reverse("saved-lessons") + "?fields=id,lesson_id")
+        self.assertNotIn("JOIN", queries.captured_queries[0]["sql"])
+
+
+class CatalogCacheTests(APITestCase):
+    def setUp(self):
+        catalog.clear()
+        self.category = Category.objects.create(name="fingerspelling", description="", order_index=0)
+        self.lesson = Lesson.objects.create(category=self.category, sign_name="A", description="", unlock_cost=0)
+
+    def test_catalog_reads_need_no_queries_once_cached(self):
+        urls = [reverse("lesson-list"), reverse("lesson-list") + "?category_name=FINGERSPELLING",
+                reverse("category-list"), reverse("total-lessons-count")]
+        for url in urls:
+            self.client.get(url)
+        for url in urls:
+            with self.assertNumQueries(0):
+                self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+    def test_filter_values_give_valid_distinct_keys(self):
+        names = ["basic signs", "basic%20signs", "basic\x01signs", "basic_signs"]
+        keys = [catalog.request_key("lessons", mock.Mock(query_params={"category_name": name}), ["category_name"]) for name in names]
+
+        self.assertEqual(len(set(keys)), len(names))
+        for key in keys:
+            self.assertEqual(list(memcache_key_warnings(key)), [])
+
+        url = reverse("lesson-list") + "?category_name=basic%20signs"
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+    def test_cached_dashboard_only_reads_the_user_rows(self):
+        self.client.force_authenticate(User.objects.create_user(username="cached", email="cached@example.com"))
+        self.client.get(reverse("dashboard"))
+        with self.assertNumQueries(2):
+            self.client.get(reverse("dashboard"))
+
+    def test_saving_a_lesson_invalidates_the_catalog(self):
+        first = self.client.get(reverse("lesson-list"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lesson.sign_name = "B"
+            self.lesson.save()
+        second = self.client.get(reverse("lesson-list"))
+
+        self.assertEqual(second.data[0]["sign_name"], "B")
+        self.assertGreater(int(second["X-Catalog-Version"]), int(first["X-Catalog-Version"]))
+        self.assertNotEqual(second["ETag"], first["ETag"])
+
+    def test_deleting_a_category_invalidates_the_catalog(self):
+        self.assertEqual(len(self.client.get(reverse("category-list")).data), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.delete()
+        self.assertEqual(self.client.get(reverse("category-list")).data, [])
+
+    def test_unchanged_catalog_is_not_modified(self):
+        etag = self.client.get(reverse("category-list"))["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("category-list"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_invalid_filter_is_not_cached(self):
+        self.assertEqual(self.client.get(reverse("lesson-list") + "?category=abc").status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(reverse("lesson-list") + "?category=abc").status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class DashboardViewTests(APITestCase):
+    def setUp(self):
+        catalog.clear()
+        self.user = User.objects.create_user(username="dash", email="dash@example.com", password="pass12345")
+        self.client.force_authenticate(self.user)
+        self.url = reverse("dashboard")
+        category = Category.objects.create(name="fingerspelling", description="", order_index=0)
+        other = Category.objects.create(name="greetings", description="", order_index=1)
+        self.lesson = Lesson.objects.create(category=category, sign_name="A", description="", unlock_cost=0)
+        Lesson.objects.create(category=other, sign_name="hello", description="", unlock_cost=0)
+        UnlockedLesson.objects.create(user=self.user, lesson=self.lesson)
+
+    def test_returns_everything_for_a_category(self):
+        response = self.client.get(self.url + "?category_name=fingerspelling")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["profile"]["username"], "dash")
+        self.assertEqual([lesson["sign_name"] for lesson in response.data["lessons"]], ["A"])
+        self.assertEqual(response.data["total_lessons"], 2)
+        self.assertEqual(response.data["unlocked_lessons"][0]["lesson"]["id"], self.lesson.id)
+        self.assertEqual(response.data["progress"], [])
+
+    def test_unchanged_dashboard_is_not_modified(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        self.assertFalse(response.content)
+
+    def test_progress_changes_the_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.client.post(reverse("update-progress", args=[self.lesson.id]))
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(len(response.data["progress"]), 1)
+
+
+class UserProgressViewTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="streaker", email="streaker@example.com", password="pass12345")
+        self.client.force_authenticate(self.user)
+        self.lesson = Lesson.objects.create(sign_name="A", description="", unlock_cost=0, completion_points=50)
+
+    def practice(self, last_streak_date, current_streak):
+        User.objects.filter(pk=self.user.pk).update(last_streak_date=last_streak_date, current_streak=current_streak)
+        response = self.client.post(reverse("update-progress", args=[self.lesson.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+
+    def test_first_practice_starts_a_streak(self):
+        self.practice(None, 0)
+        self.assertEqual((self.user.current_streak, self.user.last_streak_date, self.user.total_points), (1, date.today(), 50))
+        self.assertTrue(UserProgress.objects.filter(user=self.user, lesson=self.lesson).exists())
+
+    def test_consecutive_day_continues_the_streak(self):
+        self.practice(date.today() - timedelta(days=1), 4)
+        self.assertEqual(self.user.current_streak, 5)
+
+    def test_same_day_keeps_the_streak(self):
+        self.practice(date.today(), 4)
+        self.assertEqual(self.user.current_streak, 4)
+
+    def test_missed_day_restarts_the_streak(self):
+        self.practice(date.today() - timedelta(days=3), 4)
+        self.assertEqual(self.user.current_streak, 1)
+
+    def test_expired_streak_reads_as_zero_without_a_write(self):
+        User.objects.filter(pk=self.user.pk).update(last_streak_date=date.today() - timedelta(days=2), current_streak=6)
+        self.user.refresh_from_db()
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("user-profile"))
+
+        self.assertEqual(response.data["current_streak"], 0)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.current_streak, 6)
+
+    def test_unchanged_profile_is_not_modified(self):
+        etag = self.client.get(reverse("user-profile"))["ETag"]
+        response = self.client.get(reverse("user-profile"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_nightly_reset_only_touches_expired_streaks(self):
+        yesterday = date.today() - timedelta(days=1)
+        kept = User.objects.create_user(username="kept", email="kept@example.com", current_streak=3, last_streak_date=yesterday)
+        User.objects.filter(pk=self.user.pk).update(last_streak_date=yesterday - timedelta(days=1), current_streak=6)
+
+        with self.assertNumQueries(1):
+            call_command("reset_expired_streaks", stdout=StringIO())
+
+        self.user.refresh_from_db()
+        kept.refresh_from_db()
+        self.assertEqual((self.user.current_streak, kept.current_streak), (0, 3))
+
+    def test_unlocking_twice(self):
+        lesson = Lesson.objects.create(sign_name="B", description="", unlock_cost=0)
+        url = reverse("unlock-lesson", args=[lesson.id])
+        self.assertEqual(self.client.post(url).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.client.post(url).status_code, status.HTTP_200_OK)
+
+
+class FreeLessonProvisioningTests(TestCase):
+    def setUp(self):
+        self.free = [Lesson.objects.create(sign_name=f"free {i}", description="", unlock_cost=0) for i in range(5)]
+        Lesson.objects.create(sign_name="paid", description="", unlock_cost=100)
+
+    def unlocked(self, user):
+        return set(UnlockedLesson.objects.filter(user=user).values_list("lesson_id", flat=True))
+
+    def test_new_user_gets_every_free_lesson(self):
+        user = User.objects.create_user(username="new", email="new@example.com", password="pass12345")
+        self.assertEqual(self.unlocked(user), {lesson.id for lesson in self.free})
+
+    def test_provisioning_takes_two_queries_and_skips_existing_rows(self):
+        user = User.objects.create_user(username="again", email="again@example.com", password="pass12345")
+        with self.assertNumQueries(2):
+            provision_free_lessons(user)
+        self.assertEqual(UnlockedLesson.objects.filter(user=user).count(), len(self.free))
+
+    def test_backfill_unlocks_a_new_free_lesson_for_existing_users(self):
+        users = [User.objects.create_user(username=f"old {i}", email=f"old{i}@example.com") for i in range(7)]
+        new_lesson = Lesson.objects.create(sign_name="new free", description="", unlock_cost=0)
+
+        call_command("backfill_free_lessons", chunk_size=3, stdout=StringIO())
+
+        for user in users:
+            self.assertIn(new_lesson.id, self.unlocked(user))
+        self.assertEqual(UnlockedLesson.objects.count(), len(users) * (len(self.free) + 1))
+
+
+class LeaderboardTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.lesson = Lesson.objects.create(sign_name="A", description="", unlock_cost=0, completion_points=10)
+        self.users = [User.objects.create_user(username=f"player{i}", email=f"player{i}@example.com") for i in range(4)]
+
+    def award(self, user, times=1):
+        self.client.force_authenticate(user)
+        for _ in range(times):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(reverse("update-progress", args=[self.lesson.id]))
+
+    def board(self, user):
+        user.refresh_from_db()
+        self.client.force_authenticate(user)
+        return self.client.get(reverse("leaderboard")).data
+
+    def test_ranks_follow_awarded_points(self):
+        self.award(self.users[0], 1)
+        self.award(self.users[1], 3)
+        self.award(self.users[2], 3)
+
+        board = self.board(self.users[0])
+
+        self.assertEqual([(row["username"], row["rank"], row["total_points"]) for row in board["top"]],
+                         [("player1", 1, 30), ("player2", 1, 30), ("player0", 3, 10)])
+        self.assertEqual(board["me"], {"rank": 3, "total_points": 10})
+        self.assertEqual(self.board(self.users[3])["me"], {"rank": 4, "total_points": 0})
+
+    def test_cached_top_is_updated_in_place(self):
+        self.award(self.users[0], 2)
+        self.board(self.users[0])
+
+        self.award(self.users[3], 5)
+        self.users[3].refresh_from_db()
+        self.client.force_authenticate(self.users[3])
+        with self.assertNumQueries(1): # only the rank
+            board = self.client.get(reverse("leaderboard")).data
+
+        self.assertEqual([row["username"] for row in board["top"]], ["player3", "player0"])
+        self.assertEqual(board["me"]["rank"], 1)
+
+    def test_buckets_match_a_rebuild(self):
+        for i, user in enumerate(self.users):
+            self.award(user, i)
+        user_counts = dict(LeaderboardBucket.objects.filter(users__gt=0).values_list("points", "users"))
+
+        leaderboard.rebuild()
+
+        self.assertEqual(dict(LeaderboardBucket.objects.values_list("points", "users")), user_counts)
+        self.assertEqual(user_counts, {10: 1, 20: 1, 30: 1})
+
+
+class ConcurrentProgressTests(TransactionTestCase):
+    # Overlapping progress posts from several threads must not lose any points
+
+    def test_concurrent_posts_keep_every_point(self):
+        user = User.objects.create_user(username="racer", email="racer@example.com", password="pass12345")
+        lessons = [Lesson.objects.create(sign_name=f"sign {i}", description="", completion_points=7) for i in range(3)]
+        clients = {}
+
+        def post(call_index):
+            client = clients.setdefault(threading.get_ident(), APIClient())
+            client.force_authenticate(user)
+            response = client.post(reverse("update-progress", args=[lessons[call_index % len(lessons)].id]))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        run_concurrently(post, concurrency=8, total_calls=120)
+
+        user.refresh_from_db()
+        self.assertEqual(user.total_points, 120 * 7)
+        self.assertEqual(user.current_streak, 1)
+        self.assertEqual(UserProgress.objects.filter(user=user).count(), len(lessons))
+
+    def test_sqlite_connections_use_wal(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("SQLite only")
+        connection.close()
+        with connection.cursor() as cursor:
+            self.assertEqual(cursor.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+            self.assertEqual(cursor.execute("PRAGMA busy_timeout").fetchone()[0], 5000)
+            self.assertEqual(cursor.execute("PRAGMA synchronous").fetchone()[0], 1) # NORMAL
+
+    def test_sqlite_wal_can_be_turned_off(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("SQLite only")
+        try:
+            with override_settings(SQLITE_PRAGMAS={"journal_mode": "DELETE", "busy_timeout": 5000}):
+                connection.close()
+                with connection.cursor() as cursor:
+                    self.assertEqual(cursor.execute("PRAGMA journal_mode").fetchone()[0], "delete")
+                    self.assertEqual(cursor.execute("PRAGMA synchronous").fetchone()[0], 2) # FULL
+        finally:
+            connection.close() # the next connection switches back to WAL
+
+
+class TokenUserAuthenticationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="bearer", email="bearer@example.com", password="pass12345",
+                                             left_handed=True, total_points=70)
+        response = self.client.post(reverse("get_token"), {"email": "bearer@example.com", "password": "pass12345"}, format="json")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+
+    def test_list_endpoints_do_not_fetch_the_user(self):
+        # only an empty list checks that the user still exists
+        UnlockedLesson.objects.create(user=self.user, lesson=Lesson.objects.create(sign_name="A", description="", unlock_cost=0))
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("saved-lessons"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_other_fields_are_loaded_in_one_query(self):
+        self.client.get(reverse("leaderboard")) # caches the top list
+        with self.assertNumQueries(2): # the user row, then the rank
+            response = self.client.get(reverse("leaderboard"))
+        self.assertEqual(response.data["me"]["total_points"], 70)
+
+    def test_profile_is_fresh_after_an_update(self):
+        self.client.put(reverse("user-profile-update"), {"username": "renamed", "email": "bearer@example.com", "left_handed": False}, format="json")
+
+        response = self.client.get(reverse("user-profile"))
+
+        self.assertEqual((response.data["username"], response.data["left_handed"]), ("renamed", False))
+        self.assertEqual(response.data["total_points"], 70)
+
+    def test_tokens_without_the_claims_still_work(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.user).access_token}")
+        response = self.client.get(reverse("user-profile"))
+        self.assertEqual(response.data["username"], "bearer")
+
+    def test_token_of_a_deleted_user_is_rejected(self):
+        lesson = Lesson.objects.create(sign_name="A", description="", unlock_cost=0, completion_points=50)
+        self.user.delete()
+
+        requests = [
+            ("get", reverse("user-profile")), ("get", reverse("dashboard")), ("get", reverse("leaderboard")),
+            ("get", reverse("saved-lessons")), ("post", reverse("update-progress", args=[lesson.id])),
+            ("post", reverse("unlock-lesson", args=[lesson.id])),
+        ]
+        for method, url in requests:
+            with self.subTest(url=url):
+                response = getattr(self.client, method)(url)
+                self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_cannot_write(self):
+        lesson = Lesson.objects.create(sign_name="A", description="", unlock_cost=0, completion_points=50)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+
+        for url in [reverse("update-progress", args=[lesson.id]), reverse("unlock-lesson", args=[lesson.id])]:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.post(url).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertFalse(UserProgress.objects.exists())
+
+    def test_password_change_keeps_fields_changed_after_the_token(self):
+        self.client.put(reverse("user-profile-update"), {"username": "renamed", "email": "bearer@example.com", "left_handed": False}, format="json")
+
+        response = self.client.put(reverse("change-password"), {"old_password": "pass12345", "new_password": "newpass678"}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.username, self.user.left_handed), ("renamed", False))
+        self.assertTrue(self.user.check_password("newpass678"))
+
+    def test_token_user_refuses_a_full_save_before_load(self):
+        user = TokenUser.from_claims(self.user.pk, {"username": "stale", "left_handed": False})
+        with self.assertRaises(ValueError):
+            user.save()
+        user.load().save()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.username, "bearer")
+
+
+class LoginTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="login", email="Login.Me@Example.com", password="pass12345")
+
+    def login(self, email):
+        return self.client.post(reverse("get_token"), {"email": email, "password": "pass12345"}, format="json")
+
+    def test_email_is_matched_case_insensitively_through_the_index(self):
+        with self.assertNumQueries(1) as queries:
+            response = self.login("login.me@EXAMPLE.com")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('LOWER("api_user"."email")', queries.captured_queries[0]["sql"])
+
+    def test_wrong_email_is_rejected(self):
+        self.assertEqual(self.login("someone@example.com").status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_hash_with_other_iterations_is_upgraded_on_login(self):
+        hasher = get_hasher()
+        with override_settings(PBKDF2_ITERATIONS=1000):
+            self.user.set_password("pass12345")
+            self.user.save()
+        self.assertEqual(hasher.decode(self.user.password)["iterations"], 1000)
+
+        self.assertEqual(self.login("login.me@example.com").status_code, status.HTTP_200_OK)
+
+        self.user.refresh_from_db()
+        self.assertEqual(hasher.decode(self.user.password)["iterations"], hasher.iterations)
+
+
+class PerfInstrumentationTests(APITestCase):
+    def setUp(self):
+        catalog.clear()
+        instrumentation.stats.reset()
+        self.user = User.objects.create_user(username="timed", email="timed@example.com", password="pass12345")
+        Lesson.objects.create(sign_name="A", description="", unlock_cost=0)
+
+    def test_records_time_queries_and_size_per_endpoint(self):
+        config = {"ENABLED": True, "TRACK_SQL": True, "SERVER_TIMING": True, "DUMP_DIR": None, "DUMP_EVERY_SECONDS": 10}
+        with override_settings(PERF_INSTRUMENTATION=config):
+            client = APIClient() # middleware is loaded with the client's first request
+            client.force_authenticate(self.user)
+            response = client.get(reverse("user-progress-list"))
+            client.get(reverse("user-progress-list"))
+
+        self.assertRegex(response["Server-Timing"], r'app;dur=[\d.]+, db;dur=[\d.]+;desc="1 queries, 0 repeated"')
+        entry = instrumentation.stats.snapshot()["GET /api/user/progress/"]
+        self.assertEqual((entry["requests"], entry["queries"], entry["max_queries"]), (2, 2, 1))
+        self.assertEqual(entry["bytes"], 2 * len(response.content))
+        self.assertEqual(sum(entry["histogram"]), 2)
+
+    def test_disabled_by_default(self):
+        response = self.client.get(reverse("lesson-list"))
+        self.assertNotIn("Server-Timing", response)
+        self.assertEqual(instrumentation.stats.snapshot(), {})
+
+    def test_percentiles_of_slow_requests_are_capped_at_the_slowest(self):
+        histogram = [0] * len(instrumentation.BUCKETS_MS)
+        histogram[0] = 1
+        histogram[instrumentation.bucket_index(7300.0)] = 1
+
+        self.assertEqual(instrumentation.histogram_percentile(histogram, 50, 7300.0), 1)
+        self.assertEqual(instrumentation.histogram_percentile(histogram, 95, 7300.0), 7300.0)
+
+    def test_recorder_flags_repeated_queries(self):
+        recorder = instrumentation.QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            for pk in (1, 1, 2):
+                list(Lesson.objects.filter(pk=pk))
+        self.assertEqual((recorder.count, recorder.duplicates, recorder.similar), (3, 1, 2))
+
+
+class ClassifySignViewTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="signer", email="signer@example.com", password="pass12345")
+        self.client.force_authenticate(self.user)
+        self.url = reverse("classify-sign")
+
+    def test_classifies_a_single_vector(self):
+        response = self.client.post(self.url, {"landmarks": [0.1] * 42}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["predictions"]), 1)
+        prediction = response.data["predictions"][0]
+        self.assertIn(prediction["label"], response.data["labels"])
+        self.assertAlmostEqual(sum(prediction["probabilities"]), 1.0, places=4)
+
+    def test_batch_matches_the_model(self):
+        landmarks = np.random.default_rng(0).uniform(-1, 1, (5, 42)).astype(np.float32)
+
+        response = self.client.post(self.url, {"landmarks": landmarks.tolist()}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        expected = classifier.get_classifier().predict(landmarks)
+        actual = np.array([p["probabilities"] for p in response.data["predictions"]])
+        np.testing.assert_allclose(actual, expected, atol=1e-6)
+
+    def test_rejects_wrong_shape(self):
+        response = self.client.post(self.url, {"landmarks": [[0.1] * 41]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rejects_non_numbers(self):
+        response = self.client.post(self.url, {"landmarks": ["a"] * 42}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(None)
+        response = self.client.post(self.url, {"landmarks": [0.1] * 42}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class NumpyModelExportTests(SimpleTestCase):
+    def test_loads_every_quantization_of_the_export(self):
+        exporter = settings.BASE_DIR.parent / "ml-pipeline" / "numpy_model.py"
+        if not exporter.exists():
+            self.skipTest("ml-pipeline is not checked out")
+        spec = importlib.util.spec_from_file_location("pipeline_numpy_model", exporter)
+        pipeline = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(pipeline)
+        model = classifier.NumpyMLP.load(settings.SIGN_MODEL_PATH)
+        landmarks = np.random.default_rng(0).uniform(-1, 1, (64, 42)).astype(np.float32)
+
+        for quantization, tolerance in pipeline.PARITY_TOLERANCES.items():
+            with self.subTest(quantization=quantization), tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, "model.npz")
+                pipeline.export_npz(model.layers, path, quantization, model.classes)
+
+                exported = classifier.NumpyMLP.load(path)
+                self.assertEqual((exported.quantization, exported.classes), (quantization, model.classes))
+                self.assertLessEqual(np.abs(exported.predict(landmarks) - model.predict(landmarks)).max(), tolerance["max_abs_diff"])
+
+
+class MicroBatcherTests(SimpleTestCase):
+    def test_merges_concurrent_requests_into_one_forward_pass(self):
+        batch_sizes = []
+        release = threading.Event()
+
+        def predict(x):
+            release.wait(1)
+            batch_sizes.append(len(x))
+            return x * 2
+
+        batcher = classifier.MicroBatcher(predict, max_batch_size=64, max_wait=0.2)
+        futures = [batcher.submit(np.full((2, 42), i, dtype=np.float32)) for i in range(4)]
+        release.set()
+
+        for i, future in enumerate(futures):
+            np.testing.assert_array_equal(future.result(1), np.full((2, 42), i * 2))
+        self.assertEqual(batch_sizes, [8])
+
+    def test_propagates_errors_to_every_caller(self):
+        def predict(x):
+            raise ValueError("broken model")
+
+        batcher = classifier.MicroBatcher(predict, max_wait=0)
+        with self.assertRaises(ValueError):
+            batcher.predict(np.zeros((1, 42), dtype=np.float32), timeout=1)
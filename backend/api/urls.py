@@ -34,6 +34,12 @@ urlpatterns = [
     # change password
     path('user/change-password/', views.ChangePasswordView.as_view(), name='change-password'),
     # get word of the day
-    path('word-of-the-day/', views.LatestWordOfTheDayView.as_view(), name="word-of-the-day")
+    path('word-of-the-day/', views.LatestWordOfTheDayView.as_view(), name="word-of-the-day"),
+    # profile, progress, unlocked lessons and lessons in one request
+    path('dashboard/', views.DashboardView.as_view(), name="dashboard"),
+    # top users and your own rank
+    path('leaderboard/', views.LeaderboardView.as_view(), name="leaderboard"),
+    # classify normalized hand landmarks on the server
+    path('classify/', views.ClassifySignView.as_view(), name="classify-sign"),
     
 ]
\ No newline at end of file
@@ -1,15 +1,24 @@
 from django.shortcuts import render
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Case, F, Value, When
 
 from rest_framework.views import APIView
 from rest_framework import generics, viewsets, status
-from .serializers import UserSerializer, CategorySerializer, LessonSerializer,ChangePasswordSerializer, UserProgressSerializer, UnlockedLessonSerializer, MyTokenObtainPairSerializer, UserProfileSerializer, WordOfTheDaySerializer
+from .serializers import UserSerializer, CategorySerializer, LessonSerializer,ChangePasswordSerializer, UserProgressSerializer, UnlockedLessonSerializer, MyTokenObtainPairSerializer, UserProfileSerializer, WordOfTheDaySerializer, ClassifyLandmarksSerializer, requested_fields
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from .models import Category, Lesson, UserProgress, UnlockedLesson, WordOfTheDay
 from rest_framework.response import Response
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework_simplejwt.views import TokenObtainPairView
+from .authentication import load_user
 from .filters import LessonFilter
+from .pagination import LessonPagination, ProgressPagination, UnlockedLessonPagination
+from . import catalog, classifier, leaderboard
 from datetime import date, timedelta
+from hashlib import md5
+from django.utils.http import parse_etags, quote_etag
+from rest_framework.renderers import JSONRenderer
 
 
 User = get_user_model()
@@ -25,25 +34,37 @@ User = get_user_model()
 class MyTokenObtainPairView(TokenObtainPairView):
     serializer_class = MyTokenObtainPairSerializer
 
+# Per-user GET response with an ETag of its payload, answered with 304 when the client's If-None-Match still matches
+def conditional_response(request, data):
+    etag = quote_etag(md5(JSONRenderer().render(data)).hexdigest())
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(data, status=status.HTTP_200_OK)
+    response['ETag'] = etag
+    # the browser may keep it, but has to revalidate every time since progress changes any moment
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
 # POST - View for creating a new User
 class CreateUserView(generics.CreateAPIView):
     queryset = User.objects.all()  # provide the data to be worked on
     serializer_class = UserSerializer # used when needing to validate incoming data or prepare outgoing data
     permission_classes = [AllowAny]
 
-# GET - User information , automatically reset streaks if exceeding one day for not practicing
+# GET - User information. The streak is computed on read (User.effective_streak), so this never writes;
+# expired streaks are reset in the database by the nightly `manage.py reset_expired_streaks`
 class UserProfileView(generics.RetrieveAPIView):
     serializer_class = UserProfileSerializer
     permission_classes = [IsAuthenticated]
 
     def get_object(self):
-        user = self.request.user
-        # reset user streak if havnet practiced form >1 day
-        if user.last_streak_date and (date.today() - user.last_streak_date).days > 1:
-            user.current_streak = 0
-            user.save(update_fields=['current_streak'])
-        return self.request.user
-    
+        # fresh from the database, the token's copy of username and left_handed may be older than an update
+        return load_user(self.request.user)
+
+    def retrieve(self, request, *args, **kwargs):
+        return conditional_response(request, self.get_serializer(self.get_object()).data)
+
 
 # PUT - This view  handle the logic for updating the user's profile. (from the settings page)
 class UserProfileUpdateView(generics.UpdateAPIView):
@@ -52,22 +73,34 @@ class UserProfileUpdateView(generics.UpdateAPIView):
 
     def get_object(self):
         # This method returns the user object to be updated.
-        return self.request.user
+        return load_user(self.request.user)
 
 # GET obtain list of categories
 class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset=Category.objects.all()
+    queryset=Category.objects.prefetch_related('lessons') # lesson names in one extra query instead of one per category
     serializer_class = CategorySerializer
     permission_classes = [AllowAny] # allow any or isautenticated, depending whether to provide snippet to non-authenticated users
 
+    def list(self, request, *args, **kwargs):
+        # served from the catalog cache, the database is only read after an admin edit
+        return catalog.cached_response(request, 'categories', lambda: super(CategoryViewSet, self).list(request, *args, **kwargs))
+
 
 # GET obtain list of lesson
 class LessonViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset=Lesson.objects.all()
+    queryset=Lesson.objects.select_related('category') # category_name is read for every lesson
     serializer_class = LessonSerializer
     permission_classes = [AllowAny] # allow any or isautenticated, depending whether to provide snippet to non-authenticated users
 
     filterset_class = LessonFilter
+    pagination_class = LessonPagination # opt in with ?page_size= or ?cursor=
+
+    def list(self, request, *args, **kwargs):
+        build = lambda: super(LessonViewSet, self).list(request, *args, **kwargs)
+        # one cache entry per filter combination, anything else (pages, ?fields=) goes straight to the database
+        if set(request.query_params) - set(LessonFilter.Meta.fields):
+            return build()
+        return catalog.cached_response(request, catalog.request_key('lessons', request, LessonFilter.Meta.fields), build)
 
 
 # GET total number of lessons:
@@ -75,9 +108,8 @@ class TotalLessonsCountView(APIView):
     permission_classes= [AllowAny]
 
     def get(self, request, *args, **kwargs):
-        # This is a very efficient database query to get the count.
-        count = Lesson.objects.count()
-        return Response({'total_lessons': count})
+        # This is a very efficient database query to get the count, and it is cached with the catalog.
+        return catalog.cached_response(request, 'total-lessons', lambda: Response({'total_lessons': Lesson.objects.count()}))
 
 # POST  update user progress (points), which also updates the streak
 class UserProgressView(APIView):
@@ -87,44 +119,66 @@ class UserProgressView(APIView):
         user = request.user
         today = date.today()
         try:
-            lesson = Lesson.objects.get(id=lesson_id)
+            lesson = Lesson.objects.only('id', 'completion_points').get(id=lesson_id)
         except Lesson.DoesNotExist:
             return Response({"error": "Lesson not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        last_practice = user.last_streak_date
-
-        # already practiced today, do nothing
-        if last_practice == today:
-            pass
-        # conescutive day, continue streak
-        elif last_practice and last_practice == today - timedelta(days=1):
-            user.current_streak += 1
-            user.last_streak_date = today
-        else:
-            user.current_streak = 1
-            user.last_streak_date = today
-
-        # Create or update the progress record
-        progress, created = UserProgress.objects.get_or_create(user=user, lesson=lesson)
-        progress.save()
-        
-        # Award points
-        user.total_points += lesson.completion_points
-        
-        # This will save changes to total_points, current_streak, and last_streak_date
-        user.save()
+        # Points and streak are computed by the database from the row's current values in a single UPDATE,
+        # so overlapping requests (double clicks, several tabs) cannot overwrite each other's points.
+        # The UPDATE comes first so the transaction takes the write lock straight away.
+        with transaction.atomic():
+            updated = User.objects.filter(pk=user.pk).update(
+                total_points=F('total_points') + lesson.completion_points,
+                current_streak=Case(
+                    # already practiced today, do nothing
+                    When(last_streak_date=today, then=F('current_streak')),
+                    # conescutive day, continue streak
+                    When(last_streak_date=today - timedelta(days=1), then=F('current_streak') + 1),
+                    default=Value(1),
+                ),
+                last_streak_date=today,
+            )
+            if not updated: # the user was deleted after the token was issued
+                raise AuthenticationFailed("User not found", code="user_not_found")
+
+            if lesson.completion_points:
+                # the new total moves the user on the leaderboard
+                new_points = User.objects.filter(pk=user.pk).values_list('total_points', flat=True).get()
+                leaderboard.record_points(user, new_points - lesson.completion_points, new_points)
+
+            # Create or update the progress record
+            progress, created = UserProgress.objects.get_or_create(user=user, lesson=lesson)
+            if not created:
+                progress.save(update_fields=['last_practiced_at'])
 
         return Response({"status": "progress saved"}, status=status.HTTP_200_OK)
 
+# joins the nested lesson and its category, unless ?fields= leaves the lesson out
+def with_nested_lesson(queryset, request):
+    fields = requested_fields(request)
+    if fields is None or 'lesson' in fields:
+        return queryset.select_related('lesson__category')
+    return queryset
+
 # -------------------------Unlocked Lesson --------------------------------
 # GET list of unlocked lesson
 class UnlockedLessonListView(generics.ListAPIView):
     serializer_class = UnlockedLessonSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = UnlockedLessonPagination # opt in with ?page_size= or ?cursor=
 
     def get_queryset(self):
-        # Filters for the logged-in user's unlocked lessons
-        return UnlockedLesson.objects.filter(user=self.request.user)
+        # Filters for the logged-in user's unlocked lessons, joining the nested lesson and its category
+        queryset = UnlockedLesson.objects.filter(user=self.request.user)
+        return with_nested_lesson(queryset, self.request)
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        # a deleted user's unlocked lessons went with it, so only an empty list needs to check the user exists
+        items = response.data.get('results') if isinstance(response.data, dict) else response.data
+        if not items and not User.objects.filter(pk=request.user.pk).exists():
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        return response
 
 # POST This view handles the logic of unlocking a new lesson. 
 class UnlockLessonView(APIView):
@@ -141,15 +195,18 @@ class UnlockLessonView(APIView):
         if UnlockedLesson.objects.filter(user=user, lesson=lesson_to_unlock).exists():
             return Response({"message": "Lesson already unlocked."}, status=status.HTTP_200_OK)
 
-        # 2. Check if the user has enough points
-        if user.total_points < lesson_to_unlock.unlock_cost:
+        # 2. Check if the user has enough points, against the current row rather than the user loaded with the request
+        if not User.objects.filter(pk=user.pk, total_points__gte=lesson_to_unlock.unlock_cost or 0).exists():
+            if not User.objects.filter(pk=user.pk).exists(): # deleted after the token was issued
+                raise AuthenticationFailed("User not found", code="user_not_found")
             return Response({"error": "Not enough points to unlock this lesson."}, status=status.HTTP_400_BAD_REQUEST)
 
         # 3. If checks pass, perform the transaction
-        # user.total_points -= lesson_to_unlock.unlock_cost
-        user.save()
-
-        UnlockedLesson.objects.create(user=user, lesson=lesson_to_unlock)
+        # (charging points would be a conditional UPDATE in the same transaction, so two unlocks can never spend the
+        # same points: User.objects.filter(pk=user.pk, total_points__gte=cost).update(total_points=F('total_points') - cost))
+        _, created = UnlockedLesson.objects.get_or_create(user=user, lesson=lesson_to_unlock)
+        if not created: # another request unlocked it in the meantime
+            return Response({"message": "Lesson already unlocked."}, status=status.HTTP_200_OK)
 
         return Response({"message": f"Lesson '{lesson_to_unlock.sign_name}' unlocked successfully!"}, status=status.HTTP_201_CREATED)
 
@@ -159,10 +216,12 @@ class UnlockLessonView(APIView):
 class UserProgressListView(generics.ListAPIView):
     serializer_class = UserProgressSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = ProgressPagination # opt in with ?page_size= or ?cursor=
 
     def get_queryset(self):
-        # for the currently logged-in user.
-        return UserProgress.objects.filter(user=self.request.user)
+        # for the currently logged-in user, joining the nested lesson and its category
+        queryset = UserProgress.objects.filter(user=self.request.user)
+        return with_nested_lesson(queryset, self.request)
     
 # PUT update user password
 class ChangePasswordView(generics.UpdateAPIView):
@@ -171,11 +230,12 @@ class ChangePasswordView(generics.UpdateAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_object(self, queryset=None):
-        return self.request.user
+        # the current row, not the token's claims
+        return load_user(self.request.user)
 
     def update(self, request, *args, **kwargs):
         self.object = self.get_object()
-        serializer = self.get_serializer(data=request.data)
+        serializer = self.get_serializer(self.object, data=request.data)
 
         if serializer.is_valid():
             serializer.save()
@@ -193,4 +253,69 @@ class LatestWordOfTheDayView(generics.ListAPIView):
         if latest_word:
             # Return it as a list (QuerySet) so ListAPIView can handle it.
             return WordOfTheDay.objects.filter(pk=latest_word.pk)
-        return WordOfTheDay.objects.none() # Return an empty QuerySet if the table is empty
\ No newline at end of file
+        return WordOfTheDay.objects.none() # Return an empty QuerySet if the table is empty
+
+# POST classify one or many normalized landmark vectors on the server
+class ClassifySignView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = ClassifyLandmarksSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        # concurrent requests are merged into one forward pass by the classifier's micro-batcher
+        probabilities = classifier.classify(serializer.validated_data["landmarks"])
+        labels = classifier.get_classifier().classes
+        best = probabilities.argmax(axis=1)
+
+        predictions = [
+            {"label": labels[index], "confidence": float(row[index]), "probabilities": row.tolist()}
+            for index, row in zip(best, probabilities)
+        ]
+        return Response({"labels": labels, "predictions": predictions}, status=status.HTTP_200_OK)
+
+def list_lessons(category_name=''):
+    lessons = Lesson.objects.select_related('category')
+    if category_name:
+        lessons = lessons.filter(category__name__iexact=category_name)
+    return LessonSerializer(lessons, many=True).data
+
+# GET everything a practice/lesson page needs in one request: profile, progress, unlocked lessons and the
+# lesson catalog (optionally for one category, e.g. /api/dashboard/?category_name=fingerspelling).
+class DashboardView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        user = load_user(request.user)
+
+        # the catalog part comes from the catalog cache
+        category_name = request.query_params.get('category_name', '').strip()
+        lessons_key = catalog.request_key('dashboard-lessons', request, ['category_name'])
+        lessons = catalog.get_payload(lessons_key, lambda: list_lessons(category_name))
+        total_lessons = catalog.get_payload('dashboard-total-lessons', Lesson.objects.count)
+        progress = UserProgress.objects.filter(user=user).select_related('lesson__category')
+        unlocked = UnlockedLesson.objects.filter(user=user).select_related('lesson__category')
+
+        data = {
+            "profile": UserProfileSerializer(user).data,
+            "progress": UserProgressSerializer(progress, many=True).data,
+            "unlocked_lessons": UnlockedLessonSerializer(unlocked, many=True).data,
+            "lessons": lessons,
+            "total_lessons": total_lessons,
+        }
+
+        return conditional_response(request, data)
+
+# GET the top of the leaderboard and the current user's rank
+class LeaderboardView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        user = request.user
+        return Response({
+            "top": [
+                {"rank": entry["rank"], "username": entry["username"], "total_points": entry["total_points"]}
+                for entry in leaderboard.ranked(leaderboard.top_users())
+            ],
+            "me": {"rank": leaderboard.rank_for_points(user.total_points), "total_points": user.total_points},
+        }, status=status.HTTP_200_OK)
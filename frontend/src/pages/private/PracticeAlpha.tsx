@@ -27,25 +27,18 @@ function PracticeAlpha() {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const [
-          unlockedLessonsResponse,
-          progressResponse,
-          lessonsResponse,
-          profileResponse,
-        ] = await Promise.all([
-          api.get("/api/unlocked-lessons/"),
-          api.get("/api/user/progress/"),
-          api.get("/api/lessons/?category_name=fingerspelling"),
-          api.get("/api/user/profile/"),
-        ]);
-        setUser(profileResponse.data);
-        const unlockedNames = unlockedLessonsResponse.data.map(
+        // one request for profile, progress, unlocked lessons and the fingerspelling lessons
+        const { data: dashboard } = await api.get(
+          "/api/dashboard/?category_name=fingerspelling"
+        );
+        setUser(dashboard.profile);
+        const unlockedNames = dashboard.unlocked_lessons.map(
           (item: UnlockedLesson) => item.lesson.sign_name.toUpperCase()
         );
         setUnlockedLessons(unlockedNames);
         console.log("Unlocked lessons:", unlockedNames);
 
-        const currentLesson = lessonsResponse.data.find(
+        const currentLesson = dashboard.lessons.find(
           (l: any) => l.sign_name.toUpperCase() === sign?.toUpperCase()
         );
         if (currentLesson) {
@@ -53,7 +46,7 @@ function PracticeAlpha() {
         }
 
         // Check if there's a progress record for this specific lesson
-        const practiced = progressResponse.data.some(
+        const practiced = dashboard.progress.some(
           (record: ProgressRecord) => record.lesson.id === currentLesson?.id
         );
         setHasPracticedBefore(practiced);
@@ -1,12 +1,27 @@
+import argparse
 import cv2
 import mediapipe as mp
 import numpy as np
-import tensorflow as tf
+import os
+import queue
+import sys
+import threading
+import time
+
+# shared helpers live in ../ml-pipeline
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ml-pipeline'))
+from landmark_dataset import load_classes
+from landmark_normalization import NUM_COORDS, NUM_LANDMARKS, landmarks_to_coords, normalize_landmarks_batch
+from numpy_model import NumpyMLP
+from prediction_smoothing import METHODS as SMOOTHING_METHODS, PredictionSmoother
 
-# --- Load Your Trained Model ---
 # Make sure the model file is in the same directory as this script
-model = tf.keras.models.load_model('asl_alphabet_model.h5')
-print("Model loaded successfully!")
+MODEL_PATH = 'asl_alphabet_model.h5'
+# The same model exported with `python ../ml-pipeline/numpy_model.py export asl_alphabet_model.h5 asl_alphabet_model.npz`
+NUMPY_MODEL_PATH = 'asl_alphabet_model.npz'
+# Binary landmark dataset the model was trained on (written by Landmark2CSV.py --format npy)
+TRAINING_DATASET_PATH = 'asl_landmarks_training'
+STAGES = ("queue", "tracking", "classify", "display")
 
 # --- Define Your Classes ---
 # IMPORTANT: This list MUST be in the same alphabetical order that your LabelEncoder used during training
@@ -15,79 +30,299 @@ class_names = [
     'A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J', 'K', 'L', 'M',
     'N', 'Nothing', 'O', 'P', 'Q', 'R', 'S', 'T', 'U', 'V', 'W', 'X', 'Y', 'Z'
 ]
+# The binary dataset stores the exact class order used for training, prefer it when it is available
+if os.path.isdir(TRAINING_DATASET_PATH):
+    class_names = load_classes(TRAINING_DATASET_PATH)
 
-# --- Initialize MediaPipe and Webcam ---
+# --- Initialize MediaPipe ---
 mp_hands = mp.solutions.hands
-hands = mp_hands.Hands(static_image_mode=False, max_num_hands=1, min_detection_confidence=0.5)
 mp_drawing = mp.solutions.drawing_utils
 
-cap = cv2.VideoCapture(0)  # Start the webcam
 
+# --- Classifiers ---
+# Each returns a function taking the (1, 42) float32 model input and returning the class probabilities.
+# Only the keras, tflite and predict backends import TensorFlow.
 
-def normalize_landmarks(hand_landmarks_list):
-    """The same normalization function from your data prep script."""
-    coords = np.array([[lm.x, lm.y] for lm in hand_landmarks_list])
-    wrist_coords = coords[0]
-    translated_coords = coords - wrist_coords
+def load_numpy_classifier(npz_path):
+    """Pure NumPy forward pass over the exported weights, no TensorFlow needed."""
+    global class_names
+    model = NumpyMLP.load(npz_path)
+    if model.classes:
+        class_names = model.classes
+    return lambda x: model.predict(x)[0]
 
-    max_val = np.max(np.abs(translated_coords))
-    if max_val == 0:
-        return None  # Avoid division by zero
 
-    normalized_coords = translated_coords / max_val
-    return normalized_coords.flatten().tolist()
+def load_predict_classifier(model_path):
+    """The original Keras model.predict, only kept for comparison: it has a large fixed cost per call."""
+    import tensorflow as tf
 
+    model = tf.keras.models.load_model(model_path)
+    return lambda x: model.predict(x, verbose=0)[0]
 
-# Real-Time Prediction Loop
-while cap.isOpened():
-    ret, frame = cap.read()
-    if not ret:
-        break
 
-    # Flip the frame horizontally for a later selfie-view display
-    # and convert the BGR image to RGB.
-    frame = cv2.cvtColor(cv2.flip(frame, 1), cv2.COLOR_BGR2RGB)
+def load_keras_classifier(model_path):
+    """Calls the model directly through a traced tf.function, skipping predict()'s per-call setup."""
+    import tensorflow as tf
 
-    # Process the frame to find hands
-    results = hands.process(frame)
+    model = tf.keras.models.load_model(model_path)
 
-    # Convert the RGB image back to BGR for display with OpenCV
-    frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+    @tf.function(input_signature=[tf.TensorSpec(shape=[1, NUM_COORDS], dtype=tf.float32)])
+    def classify(x):
+        return model(x, training=False)
 
-    # If a hand is detected
-    if results.multi_hand_landmarks:
-        for hand_landmarks in results.multi_hand_landmarks:
-            # Draw the landmarks on the frame
-            mp_drawing.draw_landmarks(frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
+    return lambda x: classify(x).numpy()[0]
 
-            # PREDICTION LOGIC
-            # 1. Normalize the landmarks
-            normalized_data = normalize_landmarks(hand_landmarks.landmark)
 
-            if normalized_data:
-                # 2. Reshape the data to match the model's input shape
-                prediction_input = np.array([normalized_data])
+def load_tflite_classifier(model_path, tflite_path=None):
+    """Runs a TFLite interpreter, converting the Keras model in memory when no .tflite file is given."""
+    import tensorflow as tf
+
+    if tflite_path:
+        interpreter = tf.lite.Interpreter(model_path=tflite_path)
+    else:
+        converter = tf.lite.TFLiteConverter.from_keras_model(tf.keras.models.load_model(model_path))
+        interpreter = tf.lite.Interpreter(model_content=converter.convert())
+    interpreter.resize_tensor_input(interpreter.get_input_details()[0]['index'], [1, NUM_COORDS])
+    interpreter.allocate_tensors()
+    input_index = interpreter.get_input_details()[0]['index']
+    output_index = interpreter.get_output_details()[0]['index']
+
+    def classify(x):
+        interpreter.set_tensor(input_index, x)
+        interpreter.invoke()
+        return interpreter.get_tensor(output_index)[0]
+
+    return classify
+
+
+def load_classifier(args):
+    if args.backend == "numpy":
+        return load_numpy_classifier(args.npz)
+    if args.backend == "predict":
+        return load_predict_classifier(args.model)
+    if args.backend == "tflite":
+        return load_tflite_classifier(args.model, args.tflite)
+    return load_keras_classifier(args.model)
+
+
+# --- Pipeline ---
+
+class FrameGrabber(threading.Thread):
+    """Reads webcam frames on its own thread.
+
+    The queue is bounded (one frame by default). When the consumer falls behind, the oldest frame is
+    dropped so the prediction is always made on the most recent image instead of a growing backlog.
+    """
+
+    def __init__(self, cap, max_frames=1):
+        super().__init__(daemon=True)
+        self.cap = cap
+        self.frames = queue.Queue(maxsize=max_frames)
+        self.stopped = threading.Event()
+        self.dropped = 0
+
+    def run(self):
+        while not self.stopped.is_set():
+            ret, frame = self.cap.read()
+            captured_at = time.perf_counter()
+            if not ret:
+                break
+            try:
+                self.frames.put_nowait((frame, captured_at))
+            except queue.Full:
+                try:
+                    self.frames.get_nowait() # drop the stale frame
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+                self.frames.put_nowait((frame, captured_at))
+        self.frames.put(None) # tells the consumer that the camera is done
+
+    def read(self):
+        """Returns the newest (frame, captured_at), or None once the camera has stopped."""
+        return self.frames.get()
+
+    def stop(self):
+        self.stopped.set()
+
+
+def serial_frames(cap):
+    """The same (frame, captured_at) stream as FrameGrabber, read on the calling thread."""
+    while cap.isOpened():
+        ret, frame = cap.read()
+        if not ret:
+            break
+        yield frame, time.perf_counter()
+
+
+class LatencyStats:
+    """Averages per-stage latency and prints it with the end-to-end FPS every report_every frames."""
+
+    def __init__(self, report_every=60):
+        self.report_every = report_every
+        self.reset()
+
+    def reset(self):
+        self.totals = dict.fromkeys(STAGES + ("end_to_end",), 0.0)
+        self.frames = 0
+        self.classified = 0
+        self.started_at = time.perf_counter()
+
+    def add(self, captured_at, timestamps, classified):
+        previous = captured_at
+        for stage in STAGES:
+            self.totals[stage] += timestamps[stage] - previous
+            previous = timestamps[stage]
+        self.totals["end_to_end"] += previous - captured_at
+        self.frames += 1
+        self.classified += classified
+
+        if self.frames == self.report_every:
+            self.report()
+            self.reset()
 
-                # 3. Make a prediction
-                prediction_array = model.predict(prediction_input)
+    def report(self, dropped=None):
+        if not self.frames:
+            return
+        elapsed = time.perf_counter() - self.started_at
+        stages = "  ".join(f"{stage} {self.totals[stage] / self.frames * 1000:5.1f}ms" for stage in STAGES)
+        line = (f"{self.frames / elapsed:5.1f} FPS  sign-to-label {self.totals['end_to_end'] / self.frames * 1000:5.1f}ms  "
+                f"[{stages}]  classified {self.classified}/{self.frames}")
+        if dropped is not None:
+            line += f"  dropped {dropped}"
+        print(line)
 
-                # 4. Get the predicted class and confidence
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Live ASL alphabet recognition from the webcam.")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--npz", default=NUMPY_MODEL_PATH, help="NumPy export of the model for --backend numpy")
+    parser.add_argument("--backend", choices=["numpy", "keras", "tflite", "predict"], default="numpy",
+                        help="numpy: NumPy forward pass, keras: compiled direct call, tflite: TFLite interpreter, "
+                             "predict: the old model.predict")
+    parser.add_argument("--tflite", help=".tflite file for --backend tflite (converted from --model when omitted)")
+    parser.add_argument("--serial", action="store_true", help="capture on the main thread like the original loop")
+    parser.add_argument("--camera", type=int, default=0)
+    parser.add_argument("--report-every", type=int, default=60, help="print latency stats every N frames")
+    parser.add_argument("--smoothing", choices=SMOOTHING_METHODS + ("none",), default="ema",
+                        help="ema: moving average of the probabilities, vote: majority of the last --window frames, "
+                             "none: show every frame's own prediction")
+    parser.add_argument("--alpha", type=float, default=0.3, help="weight of the newest frame for --smoothing ema")
+    parser.add_argument("--window", type=int, default=8, help="frames voting for --smoothing vote")
+    parser.add_argument("--enter-threshold", type=float, default=0.7, help="smoothed confidence needed to show a letter")
+    parser.add_argument("--exit-threshold", type=float, default=0.5, help="a shown letter stays until its confidence drops below this")
+    parser.add_argument("--still-threshold", type=float, default=0.02,
+                        help="mean landmark movement below which a frame reuses the last prediction (0 classifies every frame)")
+    parser.add_argument("--max-skip", type=int, default=5, help="most frames in a row that reuse the last prediction")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    classify = load_classifier(args)
+    print("Model loaded successfully!")
+
+    hands = mp_hands.Hands(static_image_mode=False, max_num_hands=1, min_detection_confidence=0.5)
+    cap = cv2.VideoCapture(args.camera)  # Start the webcam
+
+    grabber = None
+    if args.serial:
+        frames = serial_frames(cap)
+    else:
+        grabber = FrameGrabber(cap)
+        grabber.start()
+        frames = iter(grabber.read, None)
+
+    # Buffers reused for every frame, so the loop does not allocate per prediction
+    coords = np.empty((1, NUM_LANDMARKS, 2), dtype=np.float32)
+    prediction_input = np.empty((1, NUM_COORDS), dtype=np.float32)
+    valid = np.empty(1, dtype=bool)
+    stats = LatencyStats(args.report_every)
+    smoother = None
+    if args.smoothing != "none":
+        smoother = PredictionSmoother(len(class_names), method=args.smoothing, alpha=args.alpha, window=args.window,
+                                      enter_threshold=args.enter_threshold, exit_threshold=args.exit_threshold,
+                                      still_threshold=args.still_threshold, max_skip=args.max_skip)
+
+    # Real-Time Prediction Loop
+    for frame, captured_at in frames:
+        timestamps = {"queue": time.perf_counter()}
+
+        # Flip the frame horizontally for a later selfie-view display
+        # and convert the BGR image to RGB.
+        frame = cv2.cvtColor(cv2.flip(frame, 1), cv2.COLOR_BGR2RGB)
+
+        # Process the frame to find hands
+        results = hands.process(frame)
+        timestamps["tracking"] = time.perf_counter()
+
+        # Convert the RGB image back to BGR for display with OpenCV
+        frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+
+        # If a hand is detected
+        text = None
+        classified = False
+        if results.multi_hand_landmarks:
+            hand_landmarks = results.multi_hand_landmarks[0]
+
+            # PREDICTION LOGIC
+            # 1. Normalize the landmarks, straight into the (1, 42) model input
+            landmarks_to_coords(hand_landmarks.landmark, out=coords[0])
+            normalize_landmarks_batch(coords, out=prediction_input, valid=valid)
+
+            if valid[0] and smoother is None:
+                # 2. Make a prediction
+                prediction_array = classify(prediction_input)
+                classified = True
+
+                # 3. Get the predicted class and confidence
                 predicted_class_index = np.argmax(prediction_array)
-                prediction_confidence = np.max(prediction_array)
+                prediction_confidence = prediction_array[predicted_class_index]
                 predicted_letter = class_names[predicted_class_index]
-
-                # Display the prediction on the screen
                 text = f"{predicted_letter} ({prediction_confidence * 100:.2f}%)"
-                cv2.putText(frame, text, (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2, cv2.LINE_AA)
+            elif valid[0]:
+                # 2. Predict, unless the hand is still and the last prediction holds
+                if smoother.should_classify(prediction_input):
+                    predicted_class_index, prediction_confidence = smoother.update(classify(prediction_input))
+                    classified = True
+                else:
+                    predicted_class_index, prediction_confidence = smoother.current()
+
+                # 3. Only a letter that is stable over the last frames is shown
+                if predicted_class_index is not None:
+                    text = f"{class_names[predicted_class_index]} ({prediction_confidence * 100:.2f}%)"
+        elif smoother:
+            smoother.reset() # the hand left the frame, start over when it comes back
+        timestamps["classify"] = time.perf_counter()
+
+        if results.multi_hand_landmarks:
+            # Draw the landmarks on the frame
+            mp_drawing.draw_landmarks(frame, results.multi_hand_landmarks[0], mp_hands.HAND_CONNECTIONS)
+        if text:
+            # Display the prediction on the screen
+            cv2.putText(frame, text, (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2, cv2.LINE_AA)
+
+        # Show the frame in a window
+        cv2.imshow('Live ASL Detection', frame)
+        key = cv2.waitKey(1) & 0xFF
+        timestamps["display"] = time.perf_counter()
+        stats.add(captured_at, timestamps, classified)
+
+        # Break the loop when 'q' is pressed
+        if key == ord('q'):
+            break
+
+    stats.report(dropped=grabber.dropped if grabber else None)
 
-    # Show the frame in a window
-    cv2.imshow('Live ASL Detection', frame)
+    # Release resources
+    if grabber:
+        grabber.stop()
+        grabber.join(timeout=1)
+    cap.release()
+    cv2.destroyAllWindows()
+    hands.close()
 
-    # Break the loop when 'q' is pressed
-    if cv2.waitKey(5) & 0xFF == ord('q'):
-        break
 
-# Release resources
-cap.release()
-cv2.destroyAllWindows()
-hands.close()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -1,76 +1,325 @@
+import argparse
 import cv2
 import csv
+import hashlib
+import json
 import mediapipe as mp
 import numpy as np
 import os
+import shutil
+import time
+from multiprocessing import Pool
 from tqdm import tqdm
+from landmark_cache import DEFAULT_MAX_BYTES, LandmarkCache, hash_image_bytes, read_image_bytes
+from landmark_dataset import save_dataset
+from landmark_normalization import NUM_COORDS, NUM_LANDMARKS, landmarks_to_coords, normalize_landmarks_batch
 
 # --- Configuration ---
 mp_hands = mp.solutions.hands
-hands = mp_hands.Hands(static_image_mode=True, max_num_hands=1, min_detection_confidence=0.5)
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+DEFAULT_CHUNK_SIZE = 256  # images handed to a worker at a time, also the checkpoint granularity
 
 # --- Paths ---
 INPUT_DATASET_PATH = "C:/Users/User/Downloads/archive/Test_Alphabet"
 OUTPUT_CSV_PATH = "asl_landmarks_Test.csv"
+CACHE_PATH = "landmark_cache.sqlite3"
 
+# Each worker process gets its own MediaPipe Hands instance and cache connection (see init_worker)
+hands = None
+cache = None
 
-def normalize_landmarks(hand_landmarks_list):
-    """Normalizes landmarks to be invariant to position and scale."""
-    coords = np.array([[lm.x, lm.y] for lm in hand_landmarks_list])
-    wrist_coords = coords[0]
-    translated_coords = coords - wrist_coords # move the hand so the wrist becomes the origin
 
-    max_val = np.max(np.abs(translated_coords))
-    if max_val == 0:
-        return None
+def hands_settings(min_detection_confidence):
+    """Everything that changes what MediaPipe returns for an image, this is part of the cache key."""
+    return {
+        "static_image_mode": True,
+        "max_num_hands": 1,
+        "min_detection_confidence": min_detection_confidence,
+        "mediapipe_version": mp.__version__,
+    }
 
-    normalized_coords = translated_coords / max_val # apply scaling rate
-    return normalized_coords.flatten().tolist()
 
+def collect_images(input_path):
+    """Lists (label, image_path) pairs in a stable order so every run chunks the dataset the same way."""
+    images = []
+    for root, dirs, files in os.walk(input_path):
+        dirs.sort() # os.walk visits sub folders in the order of this list
+        label = os.path.basename(root)
+
+        if label == os.path.basename(input_path):
+            continue
 
-# Prepare the CSV file
-with open(OUTPUT_CSV_PATH, 'w', newline='') as csvfile:
-    csv_writer = csv.writer(csvfile)
+        for filename in sorted(files):
+            if filename.lower().endswith(IMAGE_EXTENSIONS):
+                images.append((label, os.path.join(root, filename)))
+    return images
 
-    # Create and write the header row
-    header = ['label']
-    for i in range(21):
-        header += [f'x{i}', f'y{i}']
-    csv_writer.writerow(header)
 
-    for root, dirs, files in os.walk(INPUT_DATASET_PATH):
-        label = os.path.basename(root)
+def images_digest(images):
+    """Hash of the ordered (label, path, size, mtime) list, changes when an image is renamed, replaced or edited."""
+    digest = hashlib.sha256()
+    for label, image_path in images:
+        stat = os.stat(image_path)
+        digest.update(f"{label}\0{image_path}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def init_worker(settings, cache_path):
+    """Runs once in every pool process."""
+    global hands, cache
+    hands = mp_hands.Hands(static_image_mode=settings["static_image_mode"], max_num_hands=settings["max_num_hands"],
+                           min_detection_confidence=settings["min_detection_confidence"])
+    if cache_path:
+        cache = LandmarkCache(cache_path, settings)
+
+
+def detect_landmarks(img):
+    """Runs MediaPipe on a BGR image, returns the raw (21, 2) coordinates or None if no hand was found."""
+    img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    results = hands.process(img_rgb)
+
+    if results.multi_hand_landmarks:
+        return landmarks_to_coords(results.multi_hand_landmarks[0].landmark)
+    return None
+
+
+def extract_landmarks(image_path, cache_updates):
+    """Returns (readable, raw coordinates or None), using the cache when there is one.
+
+    New cache entries are only collected in cache_updates, the main process writes them.
+    """
+    if cache is None:
+        img = cv2.imread(image_path)
+        if img is None:
+            return False, None
+        return True, detect_landmarks(img)
+
+    # unchanged files are looked up by path, size and mtime without reading them
+    stat = os.stat(image_path)
+    content_hash = cache.file_hash(image_path, stat)
+    image_bytes = None
+    if content_hash is None:
+        image_bytes = read_image_bytes(image_path)
+        content_hash = hash_image_bytes(image_bytes)
+        cache_updates["new_files"].append((image_path, stat.st_size, stat.st_mtime_ns, content_hash))
 
-        if label == os.path.basename(INPUT_DATASET_PATH):
+    hit, coords = cache.get(content_hash)
+    if hit:
+        cache_updates["used_hashes"].append(content_hash)
+        return True, coords
+
+    if image_bytes is None:
+        image_bytes = read_image_bytes(image_path)
+    img = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        return False, None
+
+    coords = detect_landmarks(img)
+    cache_updates["new_landmarks"].append((content_hash, coords))
+    return True, coords
+
+
+def process_chunk(task):
+    """Worker entry point: processes one chunk and reports how long it took."""
+    chunk_index, items = task
+    start = time.perf_counter()
+    labels = []
+    has_hand = []
+    raw_coords = np.empty((len(items), NUM_LANDMARKS, 2), dtype=np.float32)
+    cache_updates = {"new_landmarks": [], "new_files": [], "used_hashes": []}
+    for label, image_path in items:
+        readable, coords = extract_landmarks(image_path, cache_updates)
+        if not readable:
+            continue
+
+        if coords is not None:
+            # If a hand IS found, process it normally.
+            raw_coords[len(labels)] = coords
+        elif label.lower() == 'nothing':
+            # If NO hand is found AND the label is 'nothing',
+            # write a row of zeros.
+            raw_coords[len(labels)] = 0.0
+        else:
             continue
+        labels.append(label)
+        has_hand.append(coords is not None)
+
+    # normalize the whole chunk in one call; hands that cannot be scaled are dropped,
+    # the zero rows of 'nothing' images are kept as they are
+    features, valid = normalize_landmarks_batch(raw_coords[:len(labels)])
+    keep = valid | ~np.array(has_hand, dtype=bool)
+    return {
+        "chunk_index": chunk_index,
+        "labels": [label for label, kept in zip(labels, keep) if kept],
+        "features": features[keep],
+        "cache_updates": cache_updates,
+        "pid": os.getpid(),
+        "num_images": len(items),
+        "busy_seconds": time.perf_counter() - start,
+    }
+
+
+# --- Checkpointing ---
+# Finished chunks are written to <output>.parts/ and recorded in <output>.manifest.json.
+# A crashed run started again with the same arguments only processes the chunks that are missing.
+
+def manifest_path_for(output_path):
+    return output_path + ".manifest.json"
+
+
+def parts_dir_for(output_path):
+    return output_path + ".parts"
+
+
+def part_path_for(output_path, chunk_index):
+    return os.path.join(parts_dir_for(output_path), f"chunk_{chunk_index:06d}.npz")
+
+
+def load_manifest(output_path, run_info):
+    """Returns the set of finished chunks, or an empty set if the manifest belongs to a different run."""
+    try:
+        with open(manifest_path_for(output_path)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return set()
+
+    if manifest.get("run") != run_info:
+        return set()
+    return {i for i in manifest.get("completed", []) if os.path.exists(part_path_for(output_path, i))}
+
+
+def save_manifest(output_path, run_info, completed):
+    # write to a temp file first so a crash mid-write never leaves a corrupt manifest
+    tmp_path = manifest_path_for(output_path) + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({"run": run_info, "completed": sorted(completed)}, f)
+    os.replace(tmp_path, manifest_path_for(output_path))
+
+
+def write_part(output_path, chunk_index, labels, features):
+    part_path = part_path_for(output_path, chunk_index)
+    tmp_path = part_path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, labels=np.asarray(labels, dtype=str), features=features)
+    os.replace(tmp_path, part_path)
+
+
+def write_csv(output_path, labels, features):
+    with open(output_path, 'w', newline='') as csvfile:
+        csv_writer = csv.writer(csvfile)
+
+        # Create and write the header row
+        header = ['label']
+        for i in range(21):
+            header += [f'x{i}', f'y{i}']
+        csv_writer.writerow(header)
+        csv_writer.writerows([label] + row for label, row in zip(labels, features.tolist()))
+
+
+def merge_parts(output_path, num_chunks, output_format):
+    """Concatenates the finished chunks in chunk order and writes the final dataset in one go."""
+    labels, features = [], []
+    for chunk_index in range(num_chunks):
+        with np.load(part_path_for(output_path, chunk_index)) as part:
+            labels.append(part['labels'])
+            features.append(part['features'])
+    labels = np.concatenate(labels) if labels else np.empty(0, dtype=str)
+    features = np.concatenate(features) if features else np.empty((0, NUM_COORDS), dtype=np.float32)
+
+    if output_format == "npy":
+        save_dataset(output_path, features, labels)
+    else:
+        write_csv(output_path, labels, features)
+
+    shutil.rmtree(parts_dir_for(output_path))
+    os.remove(manifest_path_for(output_path))
+
+
+def report_worker_throughput(worker_stats):
+    print("\nThroughput per worker:")
+    for worker_id, (pid, (num_images, busy_seconds)) in enumerate(sorted(worker_stats.items())):
+        rate = num_images / busy_seconds if busy_seconds else 0.0
+        print(f"  worker {worker_id} (pid {pid}): {num_images} images in {busy_seconds:.1f}s -> {rate:.1f} images/sec")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Extract normalized MediaPipe hand landmarks from a labelled image folder.")
+    parser.add_argument("--input", default=INPUT_DATASET_PATH, help="dataset folder with one sub folder per label")
+    parser.add_argument("--output", default=OUTPUT_CSV_PATH, help="CSV file or binary dataset folder to write")
+    parser.add_argument("--format", choices=["csv", "npy"], default="csv",
+                        help="csv, or npy for the binary landmark dataset format (see landmark_dataset.py)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of worker processes")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="images per task and per checkpoint")
+    parser.add_argument("--min-detection-confidence", type=float, default=0.5)
+    parser.add_argument("--no-resume", action="store_true", help="ignore an existing checkpoint and start over")
+    parser.add_argument("--cache", default=CACHE_PATH, help="landmark cache file (see landmark_cache.py)")
+    parser.add_argument("--no-cache", action="store_true", help="run MediaPipe on every image")
+    parser.add_argument("--cache-max-mb", type=float, default=DEFAULT_MAX_BYTES / 1024 / 1024,
+                        help="least recently used landmarks are evicted above this size")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    settings = hands_settings(args.min_detection_confidence)
+
+    images = collect_images(args.input)
+    chunks = [images[i:i + args.chunk_size] for i in range(0, len(images), args.chunk_size)]
+    print(f"Found {len(images)} images in {len(chunks)} chunks of up to {args.chunk_size}")
+
+    # anything that changes how the images are chunked or processed invalidates the checkpoint
+    run_info = {
+        "input": os.path.abspath(args.input),
+        "num_images": len(images),
+        "images_digest": images_digest(images), # same count but renamed or replaced images must not reuse chunks
+        "chunk_size": args.chunk_size,
+        "min_detection_confidence": args.min_detection_confidence,
+    }
+    completed = set() if args.no_resume else load_manifest(args.output, run_info)
+    if completed:
+        print(f"Resuming: {len(completed)} of {len(chunks)} chunks already done")
+    os.makedirs(parts_dir_for(args.output), exist_ok=True)
+    save_manifest(args.output, run_info, completed)
 
-        print(f"\nProcessing folder for label: '{label}'")
+    # the main process is the only one writing to the cache, workers just read it
+    cache_path = None if args.no_cache else os.path.abspath(args.cache)
+    main_cache = LandmarkCache(cache_path, settings, max_bytes=int(args.cache_max_mb * 1024 * 1024)) if cache_path else None
+    cache_hits = 0
 
-        for filename in tqdm(files, desc=f"Processing '{label}'"):
-            if filename.lower().endswith(('.png', '.jpg', '.jpeg')):
-                image_path = os.path.join(root, filename)
+    pending = [(i, chunk) for i, chunk in enumerate(chunks) if i not in completed]
+    worker_stats = {}  # pid -> [images, busy seconds]
+    start = time.perf_counter()
 
-                img = cv2.imread(image_path)
-                if img is None: continue
+    with Pool(processes=args.workers, initializer=init_worker, initargs=(settings, cache_path)) as pool:
+        with tqdm(total=len(images), initial=len(images) - sum(len(c) for _, c in pending), unit="img") as progress:
+            # chunks finish out of order; merge_parts restores the original order at the end
+            for result in pool.imap_unordered(process_chunk, pending):
+                if main_cache:
+                    main_cache.update(**result["cache_updates"])
+                    cache_hits += len(result["cache_updates"]["used_hashes"])
 
-                img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-                results = hands.process(img_rgb)
+                write_part(args.output, result["chunk_index"], result["labels"], result["features"])
+                completed.add(result["chunk_index"])
+                save_manifest(args.output, run_info, completed)
 
-                if results.multi_hand_landmarks:
-                    # If a hand IS found, process it normally.
-                    hand_landmarks = results.multi_hand_landmarks[0].landmark
-                    normalized_landmarks = normalize_landmarks(hand_landmarks)
+                stats = worker_stats.setdefault(result["pid"], [0, 0.0])
+                stats[0] += result["num_images"]
+                stats[1] += result["busy_seconds"]
+                progress.update(result["num_images"])
 
-                    if normalized_landmarks:
-                        csv_writer.writerow([label] + normalized_landmarks)
+    elapsed = time.perf_counter() - start
+    merge_parts(args.output, len(chunks), args.format)
 
-                elif label.lower() == 'nothing':
-                    # If NO hand is found AND the label is 'nothing',
-                    # write a row of zeros.
-                    num_coords = 21 * 2  # 42 coordinates
-                    zeros_row = [0.0] * num_coords
-                    csv_writer.writerow([label] + zeros_row)
+    processed = sum(stats[0] for stats in worker_stats.values())
+    report_worker_throughput(worker_stats)
+    if elapsed:
+        print(f"Total: {processed} images in {elapsed:.1f}s -> {processed / elapsed:.1f} images/sec")
+    if main_cache:
+        evicted = main_cache.evict()
+        main_cache.close()
+        print(f"Cache: {cache_hits} of {processed} images served from '{cache_path}', {evicted} old entries evicted")
+    print(f"\nProcessing complete! Dataset saved to '{args.output}'")
 
 
-hands.close()
-print(f"\nProcessing complete! Dataset saved to '{OUTPUT_CSV_PATH}'")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+import argparse
+import json
+import numpy as np
+import os
+import platform
+import subprocess
+import sys
+import time
+
+from landmark_normalization import NUM_COORDS
+
+# Benchmarks the alphabet classifier as an inference component, for any of its exported forms:
+#   keras   - the .h5 (or .keras) model, called through a traced tf.function
+#   tflite  - a .tflite file, or the Keras model converted in memory (--tflite-quantize for float16/dynamic int8)
+#   numpy   - a numpy_model.py export (.npz), float32, float16 or int8
+#
+# On a landmark dataset it reports the accuracy, per class precision/recall/F1 and the confusion matrix,
+# then the single-sample latency, the throughput at several batch sizes, the cold start (a fresh process
+# importing, loading and running the first prediction) and the peak RSS. With --json the results are saved
+# so runs of different backends, exports or machines can be compared, `--compare a.json b.json ...` prints them
+# side by side.
+
+BACKENDS = ("keras", "tflite", "numpy")
+TFLITE_QUANTIZATIONS = ("none", "float16", "dynamic")
+DEFAULT_BATCH_SIZES = (1, 8, 64, 512, 4096)
+
+
+def detect_backend(model_path):
+    extension = os.path.splitext(model_path)[1].lower()
+    if extension == ".npz":
+        return "numpy"
+    if extension == ".tflite":
+        return "tflite"
+    return "keras"
+
+
+def load_keras_predictor(model_path):
+    import tensorflow as tf
+
+    model = tf.keras.models.load_model(model_path)
+
+    # any batch size, traced once
+    @tf.function(input_signature=[tf.TensorSpec(shape=[None, NUM_COORDS], dtype=tf.float32)])
+    def classify(x):
+        return model(x, training=False)
+
+    return lambda x: classify(x).numpy(), {}
+
+
+def load_tflite_predictor(model_path, quantize="none"):
+    """A TFLite interpreter for a .tflite file, or for the Keras model converted in memory."""
+    import tensorflow as tf
+
+    info = {"quantization": quantize}
+    if model_path.endswith(".tflite"):
+        interpreter = tf.lite.Interpreter(model_path=model_path)
+    else:
+        converter = tf.lite.TFLiteConverter.from_keras_model(tf.keras.models.load_model(model_path))
+        if quantize != "none":
+            converter.optimizations = [tf.lite.Optimize.DEFAULT] # dynamic range int8 weights
+        if quantize == "float16":
+            converter.target_spec.supported_types = [tf.float16]
+        content = converter.convert()
+        info["model_bytes"] = len(content) # the size a saved .tflite would have
+        interpreter = tf.lite.Interpreter(model_content=content)
+    input_index = interpreter.get_input_details()[0]['index']
+    output_index = interpreter.get_output_details()[0]['index']
+    allocated = [None]
+
+    def classify(x):
+        # the interpreter has fixed shapes, resize only when the batch size changes
+        if allocated[0] != len(x):
+            interpreter.resize_tensor_input(input_index, [len(x), NUM_COORDS])
+            interpreter.allocate_tensors()
+            allocated[0] = len(x)
+        interpreter.set_tensor(input_index, x)
+        interpreter.invoke()
+        return interpreter.get_tensor(output_index)
+
+    return classify, info
+
+
+def load_numpy_predictor(npz_path):
+    from numpy_model import NumpyMLP
+
+    model = NumpyMLP.load(npz_path)
+    return model.predict, {"quantization": model.quantization, "classes": model.classes}
+
+
+def load_predictor(model_path, backend, tflite_quantize="none"):
+    """Returns (predict, info): predict maps a (N, 42) float32 array to (N, classes) probabilities."""
+    if backend == "numpy":
+        return load_numpy_predictor(model_path)
+    if backend == "tflite":
+        return load_tflite_predictor(model_path, tflite_quantize)
+    return load_keras_predictor(model_path)
+
+
+# --- Measurements ---
+
+def evaluate(predict, features, labels, num_classes, batch_size=4096):
+    """Returns (accuracy, confusion matrix), rows of the matrix are true classes, columns predicted ones."""
+    predicted = np.concatenate([predict(np.ascontiguousarray(features[start:start + batch_size], dtype=np.float32)).argmax(axis=1)
+                                for start in range(0, len(features), batch_size)])
+    confusion = np.zeros((num_classes, num_classes), dtype=np.int64)
+    np.add.at(confusion, (labels, predicted), 1)
+    return float(np.trace(confusion) / max(1, confusion.sum())), confusion
+
+
+def per_class_metrics(confusion, classes):
+    """Precision, recall, F1 and support per class, like sklearn's classification_report."""
+    true_positives = np.diag(confusion).astype(np.float64)
+    support = confusion.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precision = np.nan_to_num(true_positives / confusion.sum(axis=0))
+        recall = np.nan_to_num(true_positives / support)
+        f1 = np.nan_to_num(2 * precision * recall / (precision + recall))
+    return {name: {"precision": float(precision[i]), "recall": float(recall[i]), "f1": float(f1[i]), "support": int(support[i])}
+            for i, name in enumerate(classes)}
+
+
+def measure_latency(predict, features, samples):
+    """Per-call latency of single-sample predictions, in milliseconds."""
+    rows = np.ascontiguousarray(features[:samples], dtype=np.float32)
+    for i in range(min(10, len(rows))): # warm-up
+        predict(rows[i:i + 1])
+    latencies = []
+    for i in range(len(rows)):
+        start = time.perf_counter()
+        predict(rows[i:i + 1])
+        latencies.append(time.perf_counter() - start)
+    latencies = np.array(latencies) * 1000
+    return {"samples": len(latencies), "mean_ms": float(latencies.mean()),
+            **{f"p{pct}_ms": float(np.percentile(latencies, pct)) for pct in (50, 95, 99)}}
+
+
+def measure_throughput(predict, features, batch_size, min_seconds):
+    """Samples per second at a batch size, predicting the same batch until min_seconds have passed."""
+    batch = np.ascontiguousarray(np.resize(np.asarray(features[:batch_size]), (batch_size, NUM_COORDS)), dtype=np.float32)
+    predict(batch) # warm-up, also resizes a TFLite interpreter
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        predict(batch)
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            break
+    return {"batch_size": batch_size, "samples_per_second": batch_size * calls / elapsed, "ms_per_batch": elapsed / calls * 1000}
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process, None where the resource module does not exist (Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def cold_start(model_path, backend, tflite_quantize):
+    """Runs the cold start child in a fresh interpreter, so nothing is imported or cached yet."""
+    command = [sys.executable, os.path.abspath(__file__), os.path.abspath(model_path), "--backend", backend,
+               "--tflite-quantize", tflite_quantize, "--cold-start-child"]
+    start = time.perf_counter()
+    output = subprocess.run(command, capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["process_seconds"] = time.perf_counter() - start # includes starting Python itself
+    return result
+
+
+def cold_start_child(args):
+    start = time.perf_counter()
+    predict, _ = load_predictor(args.model, args.backend, args.tflite_quantize)
+    loaded = time.perf_counter()
+    predict(np.zeros((1, NUM_COORDS), dtype=np.float32))
+    first = time.perf_counter()
+    print(json.dumps({"load_seconds": loaded - start, "first_prediction_seconds": first - loaded,
+                      "total_seconds": first - start, "peak_rss_mb": peak_rss_mb()}))
+
+
+def machine_info():
+    info = {"platform": platform.platform(), "processor": platform.processor() or platform.machine(),
+            "cpu_count": os.cpu_count(), "python": platform.python_version(), "numpy": np.__version__}
+    if "tensorflow" in sys.modules:
+        info["tensorflow"] = sys.modules["tensorflow"].__version__
+    return info
+
+
+def compare(paths):
+    """Prints the headline numbers of several --json results next to each other."""
+    runs = []
+    for path in paths:
+        with open(path) as f:
+            runs.append(json.load(f))
+    batch_sizes = sorted({row["batch_size"] for run in runs for row in run["throughput"]})
+    print(f"{'model':<36} {'backend':<8} {'quant':<8} {'KB':>7} {'acc %':>7} {'p50 ms':>8} {'cold s':>7} {'RSS MB':>7}"
+          + "".join(f" {f'bs {size}/s':>11}" for size in batch_sizes))
+    for run in runs:
+        throughput = {row["batch_size"]: row["samples_per_second"] for row in run["throughput"]}
+        accuracy = f"{run['accuracy'] * 100:.2f}" if "accuracy" in run else "-"
+        cold = f"{run['cold_start']['total_seconds']:.2f}" if run.get("cold_start") else "-"
+        print(f"{os.path.basename(run['model'])[:36]:<36} {run['backend']:<8} {run['quantization']:<8} "
+              f"{run['model_bytes'] / 1024:>7.1f} {accuracy:>7} {run['latency']['p50_ms']:>8.3f} {cold:>7} "
+              f"{run['peak_rss_mb'] or 0:>7.0f}" + "".join(f" {throughput.get(size, 0):>11,.0f}" for size in batch_sizes))
+
+
+# --- CLI ---
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the alphabet classifier: accuracy, latency, throughput, cold start and memory.")
+    parser.add_argument("model", nargs="?", help=".h5/.keras, .tflite or .npz model")
+    parser.add_argument("--dataset", help="landmark dataset folder or CSV to evaluate on (the test set)")
+    parser.add_argument("--backend", choices=BACKENDS, help="default: from the model file extension")
+    parser.add_argument("--tflite-quantize", choices=TFLITE_QUANTIZATIONS, default="none",
+                        help="quantization when --backend tflite converts a Keras model")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=list(DEFAULT_BATCH_SIZES))
+    parser.add_argument("--latency-samples", type=int, default=1000)
+    parser.add_argument("--min-seconds", type=float, default=1.0, help="time spent on each batch size")
+    parser.add_argument("--no-cold-start", action="store_true")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--compare", nargs="+", metavar="JSON", help="only print a side by side table of earlier --json results")
+    parser.add_argument("--cold-start-child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if not args.model and not args.compare:
+        parser.error("a model is required")
+    args.backend = args.backend or (args.model and detect_backend(args.model))
+    return args
+
+
+def main():
+    args = parse_args()
+    if args.compare:
+        compare(args.compare)
+        return
+    if args.cold_start_child:
+        cold_start_child(args)
+        return
+
+    # measured first, before this process has imported anything heavy
+    cold = None if args.no_cold_start else cold_start(args.model, args.backend, args.tflite_quantize)
+
+    predict, info = load_predictor(args.model, args.backend, args.tflite_quantize)
+    results = {
+        "model": os.path.abspath(args.model),
+        "backend": args.backend,
+        "quantization": info.get("quantization", "none"),
+        "model_bytes": info.get("model_bytes", os.path.getsize(args.model)),
+        "machine": None,
+    }
+    print(f"{args.model}: {args.backend} backend, {results['quantization']} ({results['model_bytes'] / 1024:.1f} KB)")
+
+    if args.dataset:
+        from train import load_landmarks
+        features, labels, classes = load_landmarks(args.dataset)
+        if info.get("classes") and list(info["classes"]) != list(classes):
+            raise SystemExit(f"the model's classes {info['classes']} differ from the dataset's {classes}")
+        accuracy, confusion = evaluate(predict, features, labels, len(classes))
+        metrics = per_class_metrics(confusion, classes)
+        results.update(dataset=os.path.abspath(args.dataset), rows=len(labels), accuracy=accuracy,
+                       classes=classes, per_class=metrics, confusion=confusion.tolist())
+
+        print(f"\nAccuracy on {len(labels)} rows: {accuracy * 100:.2f}%")
+        print(f"  {'class':<10} {'precision':>9} {'recall':>7} {'f1':>6} {'support':>8}")
+        for name, m in metrics.items():
+            print(f"  {name:<10} {m['precision']:>9.3f} {m['recall']:>7.3f} {m['f1']:>6.3f} {m['support']:>8}")
+        mistakes = confusion.copy()
+        np.fill_diagonal(mistakes, 0)
+        worst = [(mistakes[i, j], classes[i], classes[j]) for i, j in zip(*np.nonzero(mistakes))]
+        if worst:
+            print("  most confused: " + ", ".join(f"{true}->{pred} ({count})" for count, true, pred in sorted(worst, reverse=True)[:5]))
+    else:
+        # random inputs in the normalized range, good enough for the speed measurements
+        features = np.random.default_rng(0).uniform(-1, 1, (max(args.batch_sizes + [args.latency_samples]), NUM_COORDS))
+
+    results["latency"] = measure_latency(predict, features, args.latency_samples)
+    latency = results["latency"]
+    print(f"\nSingle sample latency over {latency['samples']} calls: p50 {latency['p50_ms']:.3f} ms, "
+          f"p95 {latency['p95_ms']:.3f} ms, p99 {latency['p99_ms']:.3f} ms")
+
+    print(f"\n  {'batch':>6} {'samples/sec':>14} {'ms/batch':>10}")
+    results["throughput"] = []
+    for batch_size in args.batch_sizes:
+        row = measure_throughput(predict, features, batch_size, args.min_seconds)
+        results["throughput"].append(row)
+        print(f"  {batch_size:>6} {row['samples_per_second']:>14,.0f} {row['ms_per_batch']:>10.3f}")
+
+    results["cold_start"] = cold
+    if cold:
+        print(f"\nCold start: {cold['total_seconds']:.2f}s to load and predict once ({cold['load_seconds']:.2f}s load, "
+              f"{cold['first_prediction_seconds'] * 1000:.1f} ms first prediction), {cold['process_seconds']:.2f}s including "
+              f"the interpreter start; peak RSS {cold['peak_rss_mb'] or 0:.0f} MB")
+    results["peak_rss_mb"] = peak_rss_mb()
+    if results["peak_rss_mb"] is not None:
+        print(f"Peak RSS of this run: {results['peak_rss_mb']:.0f} MB")
+    results["machine"] = machine_info()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import argparse
+import numpy as np
+import time
+
+from landmark_normalization import NUM_COORDS, NUM_LANDMARKS, normalize_landmarks_batch
+
+# On-the-fly augmentation of normalized landmark batches (N, 42), applied per batch in the training
+# pipeline (train.py --augment) so the model sees a slightly different hand every epoch instead of
+# only the landmarks Landmark2CSV.py extracted.
+#
+# Every hand gets a small rotation around the wrist, a separate scale on x and y (a slightly different
+# camera angle or hand shape), Gaussian noise on every landmark and, with mirror_probability, is mirrored
+# left to right like a left-handed signer's hand (User.left_handed). The result is normalized again with
+# landmark_normalization, so augmented rows have exactly the form the model gets at inference time.
+# All-zero rows ("Nothing", no hand in the image) are passed through unchanged.
+# Everything is done for the whole batch with array operations, there is no loop over the samples.
+
+DEFAULT_ROTATION_DEGREES = 10.0
+DEFAULT_SCALE_JITTER = 0.1
+DEFAULT_NOISE_STD = 0.01
+DEFAULT_MIRROR_PROBABILITY = 0.5
+
+
+def augment_batch(features, rng, rotation_degrees=DEFAULT_ROTATION_DEGREES, scale_jitter=DEFAULT_SCALE_JITTER,
+                  noise_std=DEFAULT_NOISE_STD, mirror_probability=DEFAULT_MIRROR_PROBABILITY, out=None):
+    """Returns a randomly augmented copy of a (N, 42) batch of normalized landmarks.
+
+    rng is a numpy Generator. Angles are drawn uniformly from +-rotation_degrees, the x and y scales
+    from 1 +- scale_jitter. out, a (N, 42) float32 array, receives the result when given.
+    """
+    features = np.asarray(features, dtype=np.float32)
+    if features.ndim != 2 or features.shape[1] != NUM_COORDS:
+        raise ValueError(f"features must have shape (N, {NUM_COORDS}), got {features.shape}")
+    n = len(features)
+    hands = features.reshape(n, NUM_LANDMARKS, 2)
+    # the "Nothing" class is stored as all-zero rows (no hand), noise would turn them into random hands
+    empty = ~features.any(axis=1)
+
+    # one 2x2 matrix per hand: mirror, then scale x and y, then rotate
+    angles = np.radians(rng.uniform(-rotation_degrees, rotation_degrees, n)).astype(np.float32)
+    cos, sin = np.cos(angles), np.sin(angles)
+    scale = rng.uniform(1 - scale_jitter, 1 + scale_jitter, (n, 2)).astype(np.float32)
+    scale[:, 0] *= np.where(rng.random(n) < mirror_probability, -1, 1)
+    transform = np.empty((n, 2, 2), dtype=np.float32)
+    transform[:, 0, 0] = cos * scale[:, 0]
+    transform[:, 0, 1] = sin * scale[:, 0]
+    transform[:, 1, 0] = -sin * scale[:, 1]
+    transform[:, 1, 1] = cos * scale[:, 1]
+
+    # row vectors: (N, 21, 2) @ (N, 2, 2)
+    coords = hands @ transform
+    if noise_std:
+        coords += rng.normal(0, noise_std, coords.shape).astype(np.float32)
+    out, valid = normalize_landmarks_batch(coords, out=out)
+    # empty rows, and a hand collapsed onto the wrist by the noise that cannot be normalized, keep the original row
+    keep = empty | ~valid
+    if keep.any():
+        out[keep] = features[keep]
+    return out
+
+
+def make_tf_augment(seed=0, **options):
+    """Wraps augment_batch for tf.data: dataset.map(make_tf_augment(...)) on batched (features, labels).
+
+    Every batch gets its own Generator seeded from the stateless tf.data seed stream, so the map can run
+    in parallel and a run with the same seed augments identically.
+    """
+    import tensorflow as tf
+
+    def augment(features, seed_value):
+        return augment_batch(features, np.random.default_rng(int(seed_value)), **options)
+
+    def map_fn(features, labels):
+        seed_value = tf.random.uniform((), maxval=2 ** 62, dtype=tf.int64, seed=seed)
+        augmented = tf.numpy_function(augment, [features, seed_value], tf.float32, stateful=True)
+        augmented.set_shape(features.shape)
+        return augmented, labels
+
+    return map_fn
+
+
+def augment_loop(features, rng, rotation_degrees=DEFAULT_ROTATION_DEGREES, scale_jitter=DEFAULT_SCALE_JITTER,
+                 noise_std=DEFAULT_NOISE_STD, mirror_probability=DEFAULT_MIRROR_PROBABILITY):
+    """The same augmentation one sample at a time, only used as the baseline of the benchmark."""
+    out = []
+    for row in features:
+        angle = np.radians(rng.uniform(-rotation_degrees, rotation_degrees))
+        sx, sy = rng.uniform(1 - scale_jitter, 1 + scale_jitter, 2)
+        if rng.random() < mirror_probability:
+            sx = -sx
+        transform = np.array([[np.cos(angle) * sx, np.sin(angle) * sx], [-np.sin(angle) * sy, np.cos(angle) * sy]])
+        coords = row.reshape(NUM_LANDMARKS, 2) @ transform + rng.normal(0, noise_std, (NUM_LANDMARKS, 2))
+        coords -= coords[0]
+        out.append((coords / np.abs(coords).max()).reshape(-1))
+    return np.array(out, dtype=np.float32)
+
+
+# --- Micro-benchmark ---
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the throughput of the landmark augmentation.")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[32, 512, 4096])
+    parser.add_argument("--loop-samples", type=int, default=2000, help="samples used for the per-sample loop timing")
+    parser.add_argument("--pipeline-rows", type=int, default=200_000, help="rows pushed through the tf.data comparison (0 to skip)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    raw = rng.uniform(0, 1, (max(args.batch_sizes + [args.loop_samples, args.pipeline_rows]), NUM_LANDMARKS, 2))
+    features, _ = normalize_landmarks_batch(raw)
+
+    start = time.perf_counter()
+    augment_loop(features[:args.loop_samples], rng)
+    loop_rate = args.loop_samples / (time.perf_counter() - start)
+    print(f"Python loop:  {loop_rate:12,.0f} samples/sec")
+
+    for batch_size in args.batch_sizes:
+        batch = features[:batch_size]
+        out = np.empty_like(batch)
+        repeats = max(3, 200_000 // batch_size)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            augment_batch(batch, rng, out=out)
+        rate = batch_size * repeats / (time.perf_counter() - start)
+        print(f"  N={batch_size:5d}:   {rate:12,.0f} samples/sec ({rate / loop_rate:.0f}x the loop)")
+
+    if args.pipeline_rows:
+        # the same input pipeline as train.py, with and without the augmentation stage
+        import tensorflow as tf
+        from train import make_dataset
+
+        labels = np.zeros(args.pipeline_rows, dtype=np.int32)
+        rows = np.arange(args.pipeline_rows)
+        for augment in (False, True):
+            dataset = make_dataset(features, labels, rows, 512, training=True, augment=augment)
+            for _ in dataset: # first pass fills the cache
+                pass
+            start = time.perf_counter()
+            for _ in dataset:
+                pass
+            rate = args.pipeline_rows / (time.perf_counter() - start)
+            print(f"tf.data pipeline, batch 512, {'with' if augment else 'without'} augmentation: {rate:12,.0f} samples/sec")
+        print("(train.py prints the examples/sec the model trains at, the pipeline only has to stay above that)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import hashlib
+import json
+import numpy as np
+import sqlite3
+import time
+
+# On-disk cache of raw (not normalized) MediaPipe hand landmarks.
+#
+# Landmarks are keyed by a hash of the image bytes plus the MediaPipe settings they were extracted
+# with, so renaming, moving or relabelling an image never re-runs detection, and changing a setting
+# never returns stale results. A second table remembers the content hash of every file path by size
+# and modification time, so unchanged files are not even read on the next run.
+#
+# Images where no hand was found are cached too (as an empty blob), they cost as much to process as
+# any other image.
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+NO_HAND = b''
+LANDMARK_SHAPE = (21, 2)
+
+
+def hash_image_bytes(image_bytes):
+    return hashlib.blake2b(image_bytes, digest_size=20).hexdigest()
+
+
+class LandmarkCache:
+    def __init__(self, path, settings, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.settings_hash = hashlib.blake2b(json.dumps(settings, sort_keys=True).encode(), digest_size=8).hexdigest()
+
+        self.connection = sqlite3.connect(path, timeout=60)
+        # WAL lets the worker processes keep reading while the main process writes
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS landmarks (
+                content_hash TEXT NOT NULL,
+                settings_hash TEXT NOT NULL,
+                coords BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (content_hash, settings_hash)
+            );
+            CREATE INDEX IF NOT EXISTS landmarks_last_used ON landmarks (last_used);
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                content_hash TEXT NOT NULL
+            );
+        """)
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # --- reads, safe to call from the worker processes ---
+
+    def file_hash(self, path, stat):
+        """Returns the content hash recorded for this file, or None if the file is new or has changed."""
+        row = self.connection.execute(
+            "SELECT content_hash FROM files WHERE path = ? AND size = ? AND mtime_ns = ?",
+            (path, stat.st_size, stat.st_mtime_ns),
+        ).fetchone()
+        return row[0] if row else None
+
+    def get(self, content_hash):
+        """Returns (hit, coords), coords being a (21, 2) float32 array or None when no hand was found."""
+        row = self.connection.execute(
+            "SELECT coords FROM landmarks WHERE content_hash = ? AND settings_hash = ?",
+            (content_hash, self.settings_hash),
+        ).fetchone()
+        if row is None:
+            return False, None
+        return True, decode_coords(row[0])
+
+    # --- writes, only done by the main process ---
+
+    def update(self, new_landmarks=(), new_files=(), used_hashes=()):
+        """Stores freshly extracted landmarks and file hashes and marks cache hits as recently used."""
+        now = time.time()
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO landmarks (content_hash, settings_hash, coords, last_used) VALUES (?, ?, ?, ?)",
+                [(content_hash, self.settings_hash, encode_coords(coords), now) for content_hash, coords in new_landmarks],
+            )
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO files (path, size, mtime_ns, content_hash) VALUES (?, ?, ?, ?)",
+                new_files,
+            )
+            self.connection.executemany(
+                "UPDATE landmarks SET last_used = ? WHERE content_hash = ? AND settings_hash = ?",
+                [(now, content_hash, self.settings_hash) for content_hash in used_hashes],
+            )
+
+    def evict(self):
+        """Drops the least recently used landmarks until the cache fits in max_bytes. Returns the number removed."""
+        with self.connection:
+            removed = self.connection.execute("""
+                DELETE FROM landmarks WHERE rowid IN (
+                    SELECT rowid FROM (
+                        SELECT rowid, SUM(length(content_hash) + length(settings_hash) + length(coords))
+                            OVER (ORDER BY last_used DESC, rowid DESC) AS running_size
+                        FROM landmarks
+                    ) WHERE running_size > ?
+                )
+            """, (self.max_bytes,)).rowcount
+            # file hashes that no longer point at any landmarks are useless
+            self.connection.execute(
+                "DELETE FROM files WHERE content_hash NOT IN (SELECT content_hash FROM landmarks)"
+            )
+        return removed
+
+
+def encode_coords(coords):
+    if coords is None:
+        return NO_HAND
+    return np.asarray(coords, dtype=np.float32).tobytes()
+
+
+def decode_coords(blob):
+    if blob == NO_HAND:
+        return None
+    return np.frombuffer(blob, dtype=np.float32).reshape(LANDMARK_SHAPE)
+
+
+def read_image_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
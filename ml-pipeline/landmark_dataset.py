@@ -0,0 +1,106 @@
+import argparse
+import json
+import numpy as np
+import os
+import time
+
+# A landmark dataset is a folder holding three files:
+#   features.npy  - float32 array of shape (N, 42), the normalized x0, y0 ... x20, y20 coordinates
+#   labels.npy    - integer class index of every row
+#   classes.json  - class names, position i is the name of class index i
+# The class names are sorted, which is the same order sklearn's LabelEncoder uses, so the
+# label indices can be fed to the model directly.
+
+FEATURES_FILE = "features.npy"
+LABELS_FILE = "labels.npy"
+CLASSES_FILE = "classes.json"
+NUM_COORDS = 21 * 2
+
+
+def encode_labels(labels):
+    """Turns a list of label names into (sorted class names, class index per row)."""
+    classes, codes = np.unique(np.asarray(labels, dtype=str), return_inverse=True)
+    return classes.tolist(), codes.astype(np.min_scalar_type(max(len(classes) - 1, 0)))
+
+
+def save_dataset(dataset_path, features, labels):
+    """Writes features (N, 42) and their label names in bulk."""
+    features = np.ascontiguousarray(features, dtype=np.float32)
+    if features.ndim != 2 or features.shape[1] != NUM_COORDS:
+        raise ValueError(f"features must have shape (N, {NUM_COORDS}), got {features.shape}")
+    if len(labels) != len(features):
+        raise ValueError(f"got {len(labels)} labels for {len(features)} rows")
+
+    classes, codes = encode_labels(labels)
+    os.makedirs(dataset_path, exist_ok=True)
+    np.save(os.path.join(dataset_path, FEATURES_FILE), features)
+    np.save(os.path.join(dataset_path, LABELS_FILE), codes)
+    with open(os.path.join(dataset_path, CLASSES_FILE), 'w') as f:
+        json.dump(classes, f)
+
+
+def load_classes(dataset_path):
+    with open(os.path.join(dataset_path, CLASSES_FILE)) as f:
+        return json.load(f)
+
+
+def load_dataset(dataset_path, mmap=True):
+    """Returns (features, label indices, class names).
+
+    With mmap=True the features are memory-mapped read-only, so nothing is parsed or copied
+    until the rows are actually used.
+    """
+    features = np.load(os.path.join(dataset_path, FEATURES_FILE), mmap_mode='r' if mmap else None)
+    codes = np.load(os.path.join(dataset_path, LABELS_FILE))
+    return features, codes, load_classes(dataset_path)
+
+
+def read_csv(csv_path):
+    """Reads a CSV written by the old Landmark2CSV.py into (features, label names)."""
+    import pandas as pd
+
+    dtypes = {column: np.float32 for column in [f'{axis}{i}' for i in range(21) for axis in 'xy']}
+    dtypes['label'] = str
+    df = pd.read_csv(csv_path, dtype=dtypes)
+    labels = df.pop('label').to_numpy()
+    return df.to_numpy(dtype=np.float32), labels
+
+
+def convert_csv(csv_path, dataset_path):
+    features, labels = read_csv(csv_path)
+    save_dataset(dataset_path, features, labels)
+    return len(features)
+
+
+def dataset_size(dataset_path):
+    return sum(os.path.getsize(os.path.join(dataset_path, name)) for name in (FEATURES_FILE, LABELS_FILE, CLASSES_FILE))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a landmark CSV into the binary landmark dataset format.")
+    parser.add_argument("csv", help="CSV written by Landmark2CSV.py")
+    parser.add_argument("output", nargs="?", help="dataset folder to write (default: the CSV path without .csv)")
+    args = parser.parse_args()
+    output = args.output or os.path.splitext(args.csv)[0]
+
+    num_rows = convert_csv(args.csv, output)
+    print(f"Converted {num_rows} rows from '{args.csv}' to '{output}'")
+
+    # compare the cost of reading both formats back
+    start = time.perf_counter()
+    read_csv(args.csv)
+    csv_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    features, _, _ = load_dataset(output)
+    np.asarray(features).sum() # touch every page so the comparison is fair
+    binary_seconds = time.perf_counter() - start
+
+    csv_size = os.path.getsize(args.csv)
+    binary_size = dataset_size(output)
+    print(f"CSV:    {csv_size / 1e6:.2f} MB, loaded in {csv_seconds * 1000:.1f} ms")
+    print(f"Binary: {binary_size / 1e6:.2f} MB, loaded in {binary_seconds * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
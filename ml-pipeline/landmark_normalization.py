@@ -0,0 +1,133 @@
+import argparse
+import numpy as np
+import time
+
+# Landmark normalization shared by the data pipeline (Landmark2CSV.py) and live inference
+# (ml-model-prototype/modelTesting.py). Both must produce exactly the same features, or the
+# model sees different inputs at inference time than it was trained on.
+
+NUM_LANDMARKS = 21
+NUM_COORDS = NUM_LANDMARKS * 2
+
+
+def landmarks_to_coords(hand_landmarks_list, out=None):
+    """Copies MediaPipe landmarks into a (21, 2) float32 array of raw x, y coordinates."""
+    if out is None:
+        out = np.empty((NUM_LANDMARKS, 2), dtype=np.float32)
+    # one flat list is converted in a single call, far cheaper than 42 item assignments
+    out.reshape(-1)[:] = [value for lm in hand_landmarks_list for value in (lm.x, lm.y)]
+    return out
+
+
+def normalize_landmarks_batch(coords, out=None, valid=None):
+    """Normalizes a batch of hands to be invariant to position and scale.
+
+    coords is a (N, 21, 2) array of raw coordinates. Every hand is moved so the wrist becomes the
+    origin and divided by its largest absolute coordinate. The result is written to out, a (N, 42)
+    float32 array, and valid, a (N,) bool array, both allocated when not given. Hands whose
+    landmarks all sit on the wrist cannot be scaled: their row is all zeros and valid is False.
+    Returns (out, valid).
+    """
+    coords = np.asarray(coords)
+    if coords.ndim != 3 or coords.shape[1:] != (NUM_LANDMARKS, 2):
+        raise ValueError(f"coords must have shape (N, {NUM_LANDMARKS}, 2), got {coords.shape}")
+    n = coords.shape[0]
+    if out is None:
+        out = np.empty((n, NUM_COORDS), dtype=np.float32)
+    if valid is None:
+        valid = np.empty(n, dtype=bool)
+    if out.shape != (n, NUM_COORDS) or not out.flags.c_contiguous:
+        raise ValueError(f"out must be a C-contiguous array of shape ({n}, {NUM_COORDS})")
+
+    hands = out.reshape(n, NUM_LANDMARKS, 2) # a view, so everything below writes straight into out
+    np.subtract(coords, coords[:, :1, :], out=hands) # move the hand so the wrist becomes the origin
+
+    scale = np.abs(out).max(axis=1) # largest absolute coordinate per hand
+    np.greater(scale, 0, out=valid)
+
+    # apply scaling rate, rows that cannot be scaled are all zeros already and are left alone
+    np.divide(out, scale[:, None], out=out, where=valid[:, None])
+    return out, valid
+
+
+def normalize_landmarks(coords):
+    """Normalizes one (21, 2) hand, returns the 42 features or None if it cannot be scaled."""
+    out, valid = normalize_landmarks_batch(np.asarray(coords)[None])
+    return out[0] if valid[0] else None
+
+
+# --- Micro-benchmark ---
+
+def legacy_normalize_landmarks(hand_landmarks_list):
+    """The per-frame implementation that used to be copied into Landmark2CSV.py and modelTesting.py."""
+    coords = np.array([[lm.x, lm.y] for lm in hand_landmarks_list])
+    wrist_coords = coords[0]
+    translated_coords = coords - wrist_coords
+
+    max_val = np.max(np.abs(translated_coords))
+    if max_val == 0:
+        return None
+
+    normalized_coords = translated_coords / max_val
+    return normalized_coords.flatten().tolist()
+
+
+class _Landmark:
+    __slots__ = ("x", "y")
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+def _time_per_call(fn, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the legacy and batched landmark normalization.")
+    parser.add_argument("--samples", type=int, default=2000, help="hands used for the per-sample timings")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 32, 1024, 16384])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    raw = rng.random((max(args.batch_sizes + [args.samples]), NUM_LANDMARKS, 2), dtype=np.float32)
+    hands = [[_Landmark(float(x), float(y)) for x, y in hand] for hand in raw[:args.samples]]
+
+    # sanity check: both implementations agree
+    expected = np.array([legacy_normalize_landmarks(hand) for hand in hands[:100]], dtype=np.float32)
+    actual, _ = normalize_landmarks_batch(raw[:100])
+    assert np.allclose(expected, actual, atol=1e-6)
+
+    print("Per sample, from MediaPipe landmark objects:")
+    legacy = _time_per_call(lambda: [legacy_normalize_landmarks(hand) for hand in hands], 3) / len(hands)
+    coords = np.empty((1, NUM_LANDMARKS, 2), dtype=np.float32)
+    features = np.empty((1, NUM_COORDS), dtype=np.float32)
+    valid = np.empty(1, dtype=bool)
+
+    def shared():
+        for hand in hands:
+            landmarks_to_coords(hand, out=coords[0])
+            normalize_landmarks_batch(coords, out=features, valid=valid)
+
+    batched = _time_per_call(shared, 3) / len(hands)
+    print(f"  legacy:  {legacy * 1e6:8.2f} us/sample")
+    print(f"  shared:  {batched * 1e6:8.2f} us/sample ({legacy / batched:.1f}x)")
+
+    print("Per batch, from a (N, 21, 2) array:")
+    for batch_size in args.batch_sizes:
+        batch = raw[:batch_size]
+        out = np.empty((batch_size, NUM_COORDS), dtype=np.float32)
+        valid = np.empty(batch_size, dtype=bool)
+        repeats = max(3, 20000 // batch_size)
+        loop = _time_per_call(lambda: [normalize_landmarks(hand) for hand in batch], max(1, repeats // 10))
+        vectorized = _time_per_call(lambda: normalize_landmarks_batch(batch, out=out, valid=valid), repeats)
+        print(f"  N={batch_size:6d}: loop {loop * 1e3:9.3f} ms, vectorized {vectorized * 1e3:8.3f} ms "
+              f"({vectorized / batch_size * 1e9:7.1f} ns/sample, {loop / vectorized:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
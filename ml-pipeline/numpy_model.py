@@ -0,0 +1,150 @@
+import argparse
+import json
+import numpy as np
+import os
+import sys
+import time
+
+# NumpyMLP (the .npz loader and forward pass) lives in the backend, which serves the model without TensorFlow
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+from api.numpy_model import NumpyMLP
+
+# A pure NumPy version of the alphabet MLP (Dense + ReLU layers, softmax output).
+#
+# `export` reads the Keras .h5 file with h5py, without importing TensorFlow, and writes the
+# weights to a small .npz. NumpyMLP.load() (backend/api/numpy_model.py) reads it back in milliseconds, so inference
+# (modelTesting.py, the Django API) does not need TensorFlow at all. Weights can be stored as
+# float16 or as int8 with one scale per output unit; they are expanded back to float32 when loaded,
+# so quantization only shrinks the file and costs no speed.
+#
+# `check` compares the exported model against the original Keras model (this one does need
+# TensorFlow) and fails if they disagree.
+
+QUANTIZATIONS = ("float32", "float16", "int8")
+SUPPORTED_ACTIVATIONS = ("linear", "relu", "softmax")
+SKIPPED_LAYERS = ("InputLayer", "Dropout") # no effect at inference time
+
+# how far an export may drift from the Keras model before `check` fails
+PARITY_TOLERANCES = {
+    "float32": {"max_abs_diff": 1e-4, "min_agreement": 1.0},
+    "float16": {"max_abs_diff": 1e-2, "min_agreement": 0.995},
+    "int8": {"max_abs_diff": 0.25, "min_agreement": 0.98},
+}
+
+
+def read_keras_h5(h5_path):
+    """Returns the dense layers of a Sequential Keras .h5 model as [(kernel, bias, activation), ...]."""
+    import h5py
+
+    layers = []
+    with h5py.File(h5_path, 'r') as f:
+        config = json.loads(f.attrs['model_config'])
+        weights = f['model_weights'] if 'model_weights' in f else f
+        for layer in config['config']['layers']:
+            if layer['class_name'] in SKIPPED_LAYERS:
+                continue
+            if layer['class_name'] != 'Dense':
+                raise ValueError(f"unsupported layer type {layer['class_name']}")
+
+            name = layer['config']['name']
+            activation = layer['config']['activation']
+            if activation not in SUPPORTED_ACTIVATIONS:
+                raise ValueError(f"unsupported activation {activation} in layer {name}")
+
+            # weight_names lists the layer's weights in order: kernel, then bias
+            group = weights[name]
+            kernel_name, bias_name = [n.decode() if isinstance(n, bytes) else n for n in group.attrs['weight_names']]
+            layers.append((group[kernel_name][()].astype(np.float32), group[bias_name][()].astype(np.float32), activation))
+    return layers
+
+
+def quantize_int8(kernel):
+    """Symmetric per output unit int8 quantization, returns (int8 kernel, float32 scale per column)."""
+    scale = np.abs(kernel).max(axis=0) / 127.0
+    scale[scale == 0] = 1.0
+    return np.round(kernel / scale).astype(np.int8), scale.astype(np.float32)
+
+
+def export_npz(layers, npz_path, quantization="float32", classes=None):
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"quantization must be one of {QUANTIZATIONS}")
+
+    arrays = {
+        "activations": np.array([activation for _, _, activation in layers]),
+        "quantization": np.array(quantization),
+    }
+    if classes is not None:
+        arrays["classes"] = np.array(classes)
+    for i, (kernel, bias, _) in enumerate(layers):
+        arrays[f"bias_{i}"] = bias.astype(np.float32)
+        if quantization == "int8":
+            arrays[f"kernel_{i}"], arrays[f"kernel_scale_{i}"] = quantize_int8(kernel)
+        else:
+            arrays[f"kernel_{i}"] = kernel.astype(quantization)
+    np.savez_compressed(npz_path, **arrays)
+
+
+# --- CLI ---
+
+def check_parity(h5_path, npz_path, dataset_path=None, samples=10000):
+    """Compares the NumPy export against the Keras model, returns True if it is within tolerance."""
+    import tensorflow as tf
+
+    model = NumpyMLP.load(npz_path)
+    keras_model = tf.keras.models.load_model(h5_path)
+
+    # normalized landmarks always lie in [-1, 1]
+    inputs = np.random.default_rng(0).uniform(-1, 1, size=(samples, model.num_inputs)).astype(np.float32)
+    if dataset_path:
+        from landmark_dataset import load_dataset
+        features, _, _ = load_dataset(dataset_path)
+        inputs = np.concatenate([inputs, np.asarray(features[:samples])])
+
+    expected = keras_model.predict(inputs, batch_size=4096, verbose=0)
+    actual = model.predict(inputs)
+
+    max_abs_diff = float(np.abs(expected - actual).max())
+    agreement = float(np.mean(expected.argmax(axis=1) == actual.argmax(axis=1)))
+    tolerance = PARITY_TOLERANCES[model.quantization]
+    passed = max_abs_diff <= tolerance["max_abs_diff"] and agreement >= tolerance["min_agreement"]
+
+    print(f"{model.quantization} export vs Keras on {len(inputs)} inputs: "
+          f"max |diff| {max_abs_diff:.2e}, same class {agreement * 100:.2f}% -> {'OK' if passed else 'FAILED'}")
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the Keras MLP to NumPy and check the export.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="write the weights of a .h5 model to a .npz")
+    export.add_argument("h5")
+    export.add_argument("npz")
+    export.add_argument("--quantize", choices=QUANTIZATIONS, default="float32")
+    export.add_argument("--classes", help="landmark dataset folder whose classes.json gives the class order")
+
+    check = commands.add_parser("check", help="compare a .npz export against the .h5 model (needs TensorFlow)")
+    check.add_argument("h5")
+    check.add_argument("npz")
+    check.add_argument("--dataset", help="also compare on the rows of this landmark dataset")
+    check.add_argument("--samples", type=int, default=10000)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        start = time.perf_counter()
+        classes = None
+        if args.classes:
+            from landmark_dataset import load_classes
+            classes = load_classes(args.classes)
+        export_npz(read_keras_h5(args.h5), args.npz, args.quantize, classes)
+        print(f"Exported '{args.h5}' to '{args.npz}' ({args.quantize}) in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        start = time.perf_counter()
+        NumpyMLP.load(args.npz)
+        print(f"Loading the export takes {(time.perf_counter() - start) * 1000:.1f} ms")
+    else:
+        sys.exit(0 if check_parity(args.h5, args.npz, args.dataset, args.samples) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import argparse
+import numpy as np
+import time
+
+from landmark_normalization import NUM_COORDS, NUM_LANDMARKS, normalize_landmarks_batch
+
+# Streaming stage between the per-frame classifier and the displayed letter (modelTesting.py).
+#
+# Classified on its own, every frame can come out differently, so the label flickers between neighbours
+# while the hand holds one sign. PredictionSmoother
+#   - averages the class probabilities over the last frames, with an exponential moving average ("ema")
+#     or a majority vote over a ring buffer of the last `window` predictions ("vote"),
+#   - shows a letter only once its smoothed confidence reaches enter_threshold and keeps it until it drops
+#     below exit_threshold (hysteresis), so a confidence hovering around one threshold does not blink,
+#   - skips the classifier while the hand is still: when the normalized coordinates moved less than
+#     still_threshold on average since the last classified frame, the previous result is reused, at most
+#     max_skip frames in a row so a slow change is still picked up. Landmark jitter of a still hand is
+#     around 1% of the hand size, moving to another letter changes the coordinates by far more.
+
+METHODS = ("ema", "vote")
+
+
+class PredictionSmoother:
+    def __init__(self, num_classes, method="ema", alpha=0.3, window=8, enter_threshold=0.7, exit_threshold=0.5,
+                 still_threshold=0.02, max_skip=5):
+        if method not in METHODS:
+            raise ValueError(f"method must be one of {METHODS}")
+        if exit_threshold > enter_threshold:
+            raise ValueError("exit_threshold must not be above enter_threshold")
+        self.num_classes = num_classes
+        self.method = method
+        self.alpha = alpha
+        self.window = window
+        self.enter_threshold = enter_threshold
+        self.exit_threshold = exit_threshold
+        self.still_threshold = still_threshold
+        self.max_skip = max_skip
+
+        self.smoothed = np.zeros(num_classes, dtype=np.float32)
+        self.votes = np.empty(window, dtype=np.intp)
+        self.last_features = np.empty(NUM_COORDS, dtype=np.float32)
+        self.reset()
+
+    def reset(self):
+        """Forgets the history, e.g. when the hand leaves the frame."""
+        self.smoothed[:] = 0
+        self.num_votes = 0
+        self.has_features = False
+        self.skipped = 0
+        self.label = None
+
+    def should_classify(self, features):
+        """False when the hand barely moved since the last classified frame and its result can be reused."""
+        features = np.asarray(features, dtype=np.float32).reshape(-1)
+        if (self.has_features and self.skipped < self.max_skip
+                and np.abs(features - self.last_features).mean() < self.still_threshold):
+            self.skipped += 1
+            return False
+        self.last_features[:] = features
+        self.has_features = True
+        self.skipped = 0
+        return True
+
+    def update(self, probabilities):
+        """Adds the classifier output of a frame, returns (label index or None, smoothed confidence)."""
+        probabilities = np.asarray(probabilities, dtype=np.float32).reshape(-1)
+        if self.method == "ema":
+            if self.num_votes == 0:
+                self.smoothed[:] = probabilities
+            else:
+                self.smoothed *= 1 - self.alpha
+                self.smoothed += self.alpha * probabilities
+            self.num_votes += 1
+        else:
+            self.votes[self.num_votes % self.window] = probabilities.argmax()
+            self.num_votes += 1
+            # share of the buffered frames voting for every class
+            counts = np.bincount(self.votes[:min(self.num_votes, self.window)], minlength=self.num_classes)
+            np.divide(counts, self.window, out=self.smoothed)
+        return self.current()
+
+    def current(self):
+        """The shown (label index or None, confidence), also used for frames the classifier skipped."""
+        candidate = int(self.smoothed.argmax())
+        if self.label is not None and candidate != self.label and self.smoothed[candidate] >= self.enter_threshold:
+            self.label = candidate
+        elif self.label is not None and self.smoothed[self.label] < self.exit_threshold:
+            self.label = None
+        elif self.label is None and self.smoothed[candidate] >= self.enter_threshold:
+            self.label = candidate
+        return self.label, float(self.smoothed[self.label]) if self.label is not None else 0.0
+
+
+# --- Offline simulation ---
+
+def simulate_stream(features, labels, rng, signs, hold_frames, transition_frames, tremor):
+    """A webcam-like stream of normalized features: signs held for hold_frames with hand tremor, and
+    transition_frames of movement from one sign to the next. Returns (features (F, 42), true label or -1)."""
+    frames, truth = [], []
+    previous = None
+    for label in signs:
+        hand = features[rng.choice(np.flatnonzero(labels == label))].reshape(NUM_LANDMARKS, 2)
+        if previous is not None:
+            for t in np.linspace(0, 1, transition_frames + 2)[1:-1]:
+                frames.append(previous * (1 - t) + hand * t)
+                truth.append(-1)
+        # a slow drift plus per-frame tremor around the held pose
+        drift = np.cumsum(rng.normal(0, tremor / 4, (hold_frames, NUM_LANDMARKS, 2)), axis=0)
+        frames.extend(hand + drift + rng.normal(0, tremor, (hold_frames, NUM_LANDMARKS, 2)))
+        truth.extend([label] * hold_frames)
+        previous = hand
+    normalized, _ = normalize_landmarks_batch(np.array(frames, dtype=np.float32))
+    return normalized, np.array(truth)
+
+
+def run_stream(frames, predict, smoother=None):
+    """Returns (shown label per frame, -1 for none; classifier calls)."""
+    shown = np.full(len(frames), -1)
+    calls = 0
+    for i, features in enumerate(frames):
+        if smoother is None:
+            calls += 1
+            shown[i] = predict(features[None])[0].argmax()
+            continue
+        if smoother.should_classify(features):
+            calls += 1
+            label, _ = smoother.update(predict(features[None])[0])
+        else:
+            label, _ = smoother.current()
+        shown[i] = -1 if label is None else label
+    return shown, calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate a webcam stream and compare raw per-frame predictions with the smoothed ones.")
+    parser.add_argument("npz", help="NumPy export of the model (numpy_model.py)")
+    parser.add_argument("dataset", help="landmark dataset folder or CSV the held signs are taken from")
+    parser.add_argument("--signs", type=int, default=40)
+    parser.add_argument("--hold-frames", type=int, default=45, help="frames every sign is held (1.5s at 30 FPS)")
+    parser.add_argument("--transition-frames", type=int, default=10)
+    parser.add_argument("--tremor", type=float, default=0.002, help="per-frame landmark noise, relative to the hand size")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    from numpy_model import NumpyMLP
+    from train import load_landmarks
+
+    model = NumpyMLP.load(args.npz)
+    features, labels, classes = load_landmarks(args.dataset)
+    rng = np.random.default_rng(args.seed)
+    signs = rng.choice(np.unique(labels), args.signs)
+    frames, truth = simulate_stream(np.asarray(features), labels, rng, signs, args.hold_frames, args.transition_frames, args.tremor)
+    held = truth >= 0
+    print(f"{len(frames)} frames, {args.signs} signs held {args.hold_frames} frames each")
+
+    # flicker: label changes while a sign is held, after it was first shown correctly
+    segments = np.split(np.arange(len(frames)), np.flatnonzero(truth[1:] != truth[:-1]) + 1)
+    segments = [segment for segment in segments if truth[segment[0]] >= 0]
+
+    def flicker(shown):
+        total = 0
+        for segment in segments:
+            recognized = np.flatnonzero(shown[segment] == truth[segment[0]])
+            after = shown[segment[recognized[0]:]] if len(recognized) else shown[segment]
+            total += int(np.count_nonzero(after[1:] != after[:-1]))
+        return total
+    print(f"{'stage':<34} {'calls':>6} {'calls/frame':>11} {'flicker':>8} {'correct while held':>18} {'ms':>7}")
+    setups = [("raw argmax", None)] + [
+        (f"{method} + hysteresis + skip", PredictionSmoother(len(classes), method=method)) for method in METHODS]
+    for name, smoother in setups:
+        start = time.perf_counter()
+        shown, calls = run_stream(frames, model.predict, smoother)
+        elapsed = time.perf_counter() - start
+        correct = float(np.mean(shown[held] == truth[held]))
+        print(f"{name:<34} {calls:>6} {calls / len(frames):>11.2f} {flicker(shown):>8} {correct * 100:>17.1f}% {elapsed * 1000:>7.1f}")
+    print("(flicker: label changes while one sign is held, once it was shown correctly)")
+
+
+if __name__ == "__main__":
+    main()
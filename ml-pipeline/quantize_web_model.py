@@ -0,0 +1,233 @@
+import argparse
+import base64
+import copy
+import gzip
+import json
+import numpy as np
+import os
+import time
+
+# Writes smaller variants of the tfjs graph model the frontend downloads (frontend/public/web_model),
+# using the weight quantization tfjs itself understands: every entry of the weightsManifest may carry a
+# "quantization" field, and tf.loadGraphModel() expands such weights back to float32 while loading. So a
+# variant is a drop-in replacement, only model.json and its .bin shard change, no frontend code.
+#
+#   float16 - half precision weights, half the download
+#   uint8   - one byte per weight, min + q * scale per tensor, a quarter of the download
+#
+# --prune sets the given share of the smallest weights of every kernel to zero first (magnitude pruning).
+# That does not shrink the .bin itself, but zeros compress well, so it shrinks the gzip/brotli transfer.
+#
+# Everything is done with NumPy on model.json and the shards, TensorFlow is not needed. The report compares
+# every variant against the float32 model on a landmark dataset (the test set): the weights are expanded
+# exactly as tfjs does and run through numpy_model.NumpyMLP.
+
+QUANTIZATIONS = ("float16", "uint8")
+DEFAULT_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "frontend", "public", "web_model")
+SHARD_BYTES = 4 * 1024 * 1024 # the tensorflowjs_converter default
+DTYPE_SIZES = {"float32": 4, "int32": 4, "float16": 2, "uint16": 2, "uint8": 1, "bool": 1}
+
+
+# --- Reading and writing the tfjs format ---
+
+def read_web_model(model_dir):
+    """Returns (model.json contents, {weight name: float32/int32 array}), expanding quantized weights."""
+    with open(os.path.join(model_dir, "model.json")) as f:
+        model_json = json.load(f)
+
+    weights = {}
+    for group in model_json["weightsManifest"]:
+        data = b"".join(open(os.path.join(model_dir, path), "rb").read() for path in group["paths"])
+        offset = 0
+        for entry in group["weights"]:
+            quantization = entry.get("quantization")
+            stored = quantization["dtype"] if quantization else entry["dtype"]
+            count = int(np.prod(entry["shape"], dtype=np.int64))
+            values = np.frombuffer(data, dtype=stored, count=count, offset=offset).reshape(entry["shape"])
+            offset += count * DTYPE_SIZES[stored]
+            weights[entry["name"]] = dequantize(values, quantization) if quantization else values
+    return model_json, weights
+
+
+def dequantize(values, quantization):
+    if quantization["dtype"] == "float16":
+        return values.astype(np.float32)
+    return (values.astype(np.float32) * np.float32(quantization["scale"]) + np.float32(quantization["min"])).astype(np.float32)
+
+
+def write_web_model(model_json, weights, model_dir, quantization=None):
+    """Writes model.json and its shards with every float32 weight quantized (None keeps float32)."""
+    os.makedirs(model_dir, exist_ok=True)
+    for name in os.listdir(model_dir):
+        if name.endswith(".bin"): # stale shards of an earlier export
+            os.remove(os.path.join(model_dir, name))
+
+    entries, chunks = [], []
+    for group in model_json["weightsManifest"]:
+        for entry in group["weights"]:
+            entry = {key: value for key, value in entry.items() if key != "quantization"}
+            values = weights[entry["name"]]
+            if quantization and entry["dtype"] == "float32":
+                values, entry["quantization"] = quantize(values, quantization)
+            else:
+                values = values.astype(entry["dtype"])
+            entries.append(entry)
+            chunks.append(values.tobytes())
+
+    data = b"".join(chunks)
+    num_shards = max(1, -(-len(data) // SHARD_BYTES))
+    paths = [f"group1-shard{i + 1}of{num_shards}.bin" for i in range(num_shards)]
+    for i, path in enumerate(paths):
+        with open(os.path.join(model_dir, path), "wb") as f:
+            f.write(data[i * SHARD_BYTES:(i + 1) * SHARD_BYTES])
+
+    model_json = copy.deepcopy(model_json)
+    model_json["weightsManifest"] = [{"paths": paths, "weights": entries}]
+    with open(os.path.join(model_dir, "model.json"), "w") as f:
+        json.dump(model_json, f)
+    return model_dir
+
+
+def quantize(values, dtype):
+    """Returns (stored values, manifest quantization entry) the way tensorflowjs_converter quantizes."""
+    if dtype == "float16":
+        return values.astype(np.float16), {"dtype": "float16"}
+    if dtype != "uint8":
+        raise ValueError(f"quantization must be one of {QUANTIZATIONS}")
+
+    low, high = min(float(values.min()), 0.0), max(float(values.max()), 0.0)
+    scale = (high - low) / 255 or 1.0
+    # move the range so 0 is exactly representable, pruned weights then stay exactly 0
+    zero_point = round(-low / scale)
+    low = -zero_point * scale
+    codes = np.clip(np.round((values - low) / scale), 0, 255).astype(np.uint8)
+    return codes, {"dtype": "uint8", "min": low, "scale": scale}
+
+
+# --- Pruning ---
+
+def prune(weights, kernel_names, sparsity):
+    """Copy of weights where the smallest |w| share `sparsity` of every kernel is zero (biases are kept)."""
+    pruned = dict(weights)
+    for name in kernel_names:
+        kernel = weights[name]
+        threshold = np.quantile(np.abs(kernel), sparsity)
+        pruned[name] = np.where(np.abs(kernel) <= threshold, 0, kernel).astype(np.float32)
+    return pruned
+
+
+# --- Evaluation ---
+
+def dense_layers(model_json, weights):
+    """The graph's dense layers as [(kernel, bias, activation), ...], the layout numpy_model.NumpyMLP runs.
+
+    The converter fuses MatMul + BiasAdd (+ Relu) into one _FusedMatMul node; any other kind of graph is refused.
+    """
+    nodes = model_json["modelTopology"]["node"]
+    layers, layer_of_node = [], {}
+    for node in nodes:
+        if node["op"] == "_FusedMatMul":
+            fused = [base64.b64decode(op).decode() for op in node["attr"]["fused_ops"]["list"].get("s", [])]
+            if fused not in (["BiasAdd"], ["BiasAdd", "Relu"]):
+                raise ValueError(f"unsupported fused ops {fused} in {node['name']}")
+            _, kernel, bias = node["input"][:3]
+            layer_of_node[node["name"]] = len(layers)
+            layers.append([weights[kernel], weights[bias], "relu" if "Relu" in fused else "linear"])
+        elif node["op"] == "Softmax":
+            layers[layer_of_node[node["input"][0]]][2] = "softmax"
+        elif node["op"] not in ("Const", "Placeholder", "Identity"):
+            raise ValueError(f"unsupported op {node['op']} in {node['name']}")
+    return [tuple(layer) for layer in layers]
+
+
+def kernel_names(model_json):
+    return [node["input"][1] for node in model_json["modelTopology"]["node"] if node["op"] == "_FusedMatMul"]
+
+
+def model_size(model_dir):
+    """(bytes of model.json + shards, the same gzip compressed), what the browser downloads."""
+    raw = compressed = 0
+    for name in os.listdir(model_dir):
+        if name == "model.json" or name.endswith(".bin"):
+            with open(os.path.join(model_dir, name), "rb") as f:
+                data = f.read()
+            raw += len(data)
+            compressed += len(gzip.compress(data, compresslevel=9))
+    return raw, compressed
+
+
+def compare_variant(reference, variant, features, labels=None):
+    """Accuracy of a variant next to the float32 model, and how often the two predict the same class."""
+    expected = reference.predict(features, batch_size=4096)
+    actual = variant.predict(features, batch_size=4096)
+    result = {
+        "same_class": float(np.mean(expected.argmax(axis=1) == actual.argmax(axis=1))),
+        "max_abs_diff": float(np.abs(expected - actual).max()),
+    }
+    if labels is not None:
+        result["accuracy"] = float(np.mean(actual.argmax(axis=1) == labels))
+        result["accuracy_delta"] = result["accuracy"] - float(np.mean(expected.argmax(axis=1) == labels))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write float16/uint8 (optionally pruned) variants of the tfjs web model "
+                                                 "and report their size and accuracy against the float32 model.")
+    parser.add_argument("--source", default=DEFAULT_SOURCE, help="float32 tfjs graph model folder (default: the frontend's)")
+    parser.add_argument("--output-dir", default="web_model_variants", help="every variant is written to a sub folder")
+    parser.add_argument("--quantize", choices=QUANTIZATIONS, nargs="+", default=list(QUANTIZATIONS))
+    parser.add_argument("--prune", type=float, nargs="*", default=[], metavar="SPARSITY",
+                        help="also write pruned variants with this share of each kernel set to zero, e.g. 0.5")
+    parser.add_argument("--dataset", help="landmark dataset folder or CSV (the test set) for the accuracy report")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    from numpy_model import NumpyMLP
+
+    model_json, weights = read_web_model(args.source)
+    reference = NumpyMLP(dense_layers(model_json, weights))
+    if args.dataset:
+        from train import load_landmarks
+        features, labels, _ = load_landmarks(args.dataset)
+        features = np.asarray(features, dtype=np.float32)
+    else:
+        # no dataset: only compare the predictions on random inputs in the normalized range
+        features = np.random.default_rng(0).uniform(-1, 1, (10000, reference.num_inputs)).astype(np.float32)
+        labels = None
+        print("No --dataset given, comparing against the float32 model on random inputs only")
+
+    source_bytes, source_gzip = model_size(args.source)
+    report = {"source": os.path.abspath(args.source), "source_bytes": source_bytes, "source_gzip_bytes": source_gzip, "variants": []}
+    if labels is not None:
+        report["source_accuracy"] = float(np.mean(reference.predict(features, batch_size=4096).argmax(axis=1) == labels))
+        print(f"float32 model: {report['source_accuracy'] * 100:.2f}% on {len(labels)} rows")
+
+    print(f"{'variant':<22} {'KB':>7} {'gzip KB':>8} {'size':>6} {'accuracy':>9} {'delta':>7} {'same class':>10} {'max |diff|':>10}")
+    print(f"{'float32':<22} {source_bytes / 1024:>7.1f} {source_gzip / 1024:>8.1f} {'100%':>6}")
+    for sparsity in [0.0] + args.prune:
+        variant_weights = prune(weights, kernel_names(model_json), sparsity) if sparsity else weights
+        for quantization in args.quantize:
+            name = quantization + (f"_pruned{round(sparsity * 100)}" if sparsity else "")
+            start = time.perf_counter()
+            model_dir = write_web_model(model_json, variant_weights, os.path.join(args.output_dir, f"web_model_{name}"), quantization)
+            seconds = time.perf_counter() - start
+
+            # read back what was written, so the numbers are those of the exact file the browser gets
+            variant = NumpyMLP(dense_layers(*read_web_model(model_dir)))
+            size, gzip_size = model_size(model_dir)
+            row = {"name": name, "quantization": quantization, "sparsity": sparsity, "path": os.path.abspath(model_dir),
+                   "bytes": size, "gzip_bytes": gzip_size, "export_seconds": seconds,
+                   **compare_variant(reference, variant, features, labels)}
+            report["variants"].append(row)
+            accuracy = f"{row['accuracy'] * 100:8.2f}% {row['accuracy_delta'] * 100:+7.2f}" if "accuracy" in row else f"{'-':>9} {'-':>7}"
+            print(f"{name:<22} {size / 1024:>7.1f} {gzip_size / 1024:>8.1f} {size / source_bytes:>6.0%} {accuracy} "
+                  f"{row['same_class'] * 100:>9.2f}% {row['max_abs_diff']:>10.2e}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
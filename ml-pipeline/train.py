@@ -0,0 +1,285 @@
+import argparse
+import json
+import numpy as np
+import os
+import shlex
+import shutil
+import subprocess
+import time
+
+from landmark_augmentation import (DEFAULT_MIRROR_PROBABILITY, DEFAULT_NOISE_STD, DEFAULT_ROTATION_DEGREES,
+                                   DEFAULT_SCALE_JITTER)
+from landmark_dataset import NUM_COORDS, encode_labels, load_dataset, read_csv
+
+# Trains the alphabet MLP of aslproject.ipynb from the command line, reproducibly.
+#
+# The landmark datasets are streamed into a tf.data pipeline: rows are read from the memory-mapped
+# binary dataset (or the CSV) in chunks, cached after the first epoch (in memory, or in a file with
+# --cache-file), shuffled, batched and prefetched so the next batch is ready while the current one trains.
+# Labels stay class indices (sparse crossentropy) instead of one-hot rows. --augment adds random rotation,
+# scale, noise and mirroring to every training batch (landmark_augmentation.py).
+#
+# Larger batches take far fewer steps per epoch; the learning rate warms up linearly for --warmup-epochs
+# and then follows a cosine decay so they still converge. One run writes the .h5 model, the class order
+# (the LabelEncoder order of the notebook), the NumPy export and the tfjs graph model for the frontend,
+# and reports training throughput (examples/sec) and the wall clock time until --target-accuracy is reached.
+
+MODEL_FILE = "asl_alphabet_model.h5"
+NUMPY_MODEL_FILE = "asl_alphabet_model.npz"
+CLASSES_FILE = "asl_alphabet_classes.json"
+REPORT_FILE = "training_report.json"
+WEB_MODEL_DIR = "web_model"
+READ_CHUNK_ROWS = 65536
+AUGMENT_BATCHES_PER_CALL = 16
+
+
+def load_landmarks(dataset_path, classes=None):
+    """Returns (features, label indices, class names) of a binary landmark dataset folder or a CSV.
+
+    Passing classes (the training set's) makes sure a test set uses the same label indices.
+    """
+    if os.path.isdir(dataset_path):
+        features, codes, dataset_classes = load_dataset(dataset_path)
+        names = np.asarray(dataset_classes)[codes]
+    else:
+        features, names = read_csv(dataset_path)
+        if classes is None:
+            classes, codes = encode_labels(names)
+            return features, codes.astype(np.int32), classes
+
+    if classes is None:
+        return features, np.asarray(codes, dtype=np.int32), dataset_classes
+    unknown = set(np.unique(names)) - set(classes)
+    if unknown:
+        raise ValueError(f"'{dataset_path}' has labels the training set does not have: {sorted(unknown)}")
+    return features, np.searchsorted(classes, names).astype(np.int32), list(classes)
+
+
+def stratified_split(labels, fraction, seed):
+    """Splits the row indices into (train, validation), keeping the class proportions like train_test_split(stratify=)."""
+    rng = np.random.default_rng(seed)
+    validation = []
+    for label in np.unique(labels):
+        rows = np.flatnonzero(labels == label)
+        validation.append(rng.choice(rows, size=int(round(len(rows) * fraction)), replace=False))
+    validation = np.sort(np.concatenate(validation))
+    return np.setdiff1d(np.arange(len(labels)), validation), validation
+
+
+def make_dataset(features, labels, rows, batch_size, training, seed=0, cache_file="", augment=False, augment_options=None):
+    """tf.data pipeline over features[rows]: streamed in chunks, cached, shuffled (training only), batched, prefetched.
+
+    With augment every training batch goes through landmark_augmentation.augment_batch (after the cache,
+    so each epoch gets new random variations).
+    """
+    import tensorflow as tf
+
+    def read_chunks():
+        # sorted rows read the memory-mapped file front to back
+        for start in range(0, len(rows), READ_CHUNK_ROWS):
+            chunk = rows[start:start + READ_CHUNK_ROWS]
+            yield np.asarray(features[chunk], dtype=np.float32), labels[chunk]
+
+    dataset = tf.data.Dataset.from_generator(read_chunks, output_signature=(
+        tf.TensorSpec((None, NUM_COORDS), tf.float32), tf.TensorSpec((None,), tf.int32)))
+    # the generator's length is unknown to tf.data, stating it lets Keras count the steps of an epoch
+    dataset = dataset.unbatch().apply(tf.data.experimental.assert_cardinality(len(rows))).cache(cache_file)
+    if training:
+        # the whole training set fits in the buffer easily (42 floats a row), so this is a full shuffle
+        dataset = dataset.shuffle(len(rows), seed=seed, reshuffle_each_iteration=True)
+    if training and augment:
+        from landmark_augmentation import make_tf_augment
+        # augmented in large blocks that are split into batches afterwards: every call into Python has a
+        # fixed cost much higher than augmenting a few hundred rows
+        dataset = dataset.batch(batch_size * AUGMENT_BATCHES_PER_CALL)
+        dataset = dataset.map(make_tf_augment(seed, **(augment_options or {})), num_parallel_calls=tf.data.AUTOTUNE)
+        dataset = dataset.rebatch(batch_size, drop_remainder=True)
+        # rebatch() after the map loses the number of batches, without it Keras warns the input ran out of data
+        dataset = dataset.apply(tf.data.experimental.assert_cardinality(len(rows) // batch_size))
+    else:
+        dataset = dataset.batch(batch_size, drop_remainder=training)
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+
+def build_model(num_classes, learning_rate=1e-3):
+    """The notebook's MLP: 42 -> 128 -> 64 -> classes, with dropout after both hidden layers."""
+    import tensorflow as tf
+    from tensorflow.keras import layers
+
+    model = tf.keras.Sequential([
+        tf.keras.Input(shape=(NUM_COORDS,)),
+        layers.Dense(128, activation='relu'),
+        layers.Dropout(0.2),
+        layers.Dense(64, activation='relu'),
+        layers.Dropout(0.2),
+        layers.Dense(num_classes, activation='softmax'),
+    ])
+    model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate),
+                  loss='sparse_categorical_crossentropy', metrics=['accuracy'])
+    return model
+
+
+def learning_rate_schedule(peak, steps_per_epoch, epochs, warmup_epochs):
+    """Linear warm-up to peak, then cosine decay to zero at the end of training."""
+    import tensorflow as tf
+
+    warmup_steps = int(steps_per_epoch * warmup_epochs)
+    return tf.keras.optimizers.schedules.CosineDecay(
+        initial_learning_rate=peak / 100 if warmup_steps else peak, warmup_target=peak if warmup_steps else None,
+        warmup_steps=warmup_steps, decay_steps=max(1, steps_per_epoch * epochs - warmup_steps))
+
+
+def make_progress_callback(num_examples, target_accuracy, stop_at_target):
+    """Keras callback timing every epoch and noting when the validation accuracy first reaches the target."""
+    import tensorflow as tf
+
+    class Progress(tf.keras.callbacks.Callback):
+        def on_train_begin(self, logs=None):
+            self.start = time.perf_counter()
+            self.epoch_seconds = []
+            self.time_to_target = None
+            self.epochs_to_target = None
+
+        def on_epoch_begin(self, epoch, logs=None):
+            self.epoch_start = time.perf_counter()
+
+        def on_epoch_end(self, epoch, logs=None):
+            self.epoch_seconds.append(time.perf_counter() - self.epoch_start)
+            if self.time_to_target is None and (logs or {}).get('val_accuracy', 0) >= target_accuracy:
+                self.time_to_target = time.perf_counter() - self.start
+                self.epochs_to_target = epoch + 1
+                print(f"\nReached {target_accuracy * 100:.1f}% validation accuracy after {epoch + 1} epochs, "
+                      f"{self.time_to_target:.1f}s")
+                if stop_at_target:
+                    self.model.stop_training = True
+
+        def examples_per_second(self):
+            # the first epoch also reads the files and fills the cache, report it apart
+            steady = self.epoch_seconds[1:] or self.epoch_seconds
+            return num_examples / self.epoch_seconds[0], num_examples * len(steady) / sum(steady)
+
+    return Progress()
+
+
+def dense_layers(model):
+    """The model's Dense layers as [(kernel, bias, activation), ...], the input of numpy_model.export_npz."""
+    return [(layer.kernel.numpy(), layer.bias.numpy(), layer.activation.__name__)
+            for layer in model.layers if layer.__class__.__name__ == 'Dense']
+
+
+def export_web_model(h5_path, output_dir):
+    """Converts the .h5 into the tfjs graph model the frontend loads, with tensorflowjs_converter."""
+    command = ['tensorflowjs_converter', '--input_format=keras', '--output_format=tfjs_graph_model', h5_path, output_dir]
+    if shutil.which(command[0]) is None:
+        print(f"tensorflowjs_converter not found (pip install tensorflowjs), skipped the web model. Run later:\n  {shlex.join(command)}")
+        return False
+    if os.path.isdir(output_dir):
+        shutil.rmtree(output_dir) # stale weight shards would otherwise stay next to the new model.json
+    subprocess.run(command, check=True)
+    return True
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train the ASL alphabet MLP and export it for the backend and the frontend.")
+    parser.add_argument("train", help="training landmark dataset folder (Landmark2CSV.py --format npy) or CSV")
+    parser.add_argument("--test", help="test landmark dataset folder or CSV, evaluated after training")
+    parser.add_argument("--output-dir", default=".", help="where the model, class order, exports and report are written")
+    parser.add_argument("--epochs", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=512, help="the notebook used 32")
+    parser.add_argument("--learning-rate", type=float, default=4e-3,
+                        help="peak learning rate, reached after the warm-up (Adam's default 1e-3 suits batches of 32)")
+    parser.add_argument("--warmup-epochs", type=float, default=2)
+    parser.add_argument("--validation-split", type=float, default=0.2)
+    parser.add_argument("--target-accuracy", type=float, default=0.95, help="validation accuracy to time")
+    parser.add_argument("--stop-at-target", action="store_true", help="stop training once the target accuracy is reached")
+    parser.add_argument("--augment", action="store_true", help="augment the training batches (landmark_augmentation.py)")
+    parser.add_argument("--rotation-degrees", type=float, default=DEFAULT_ROTATION_DEGREES)
+    parser.add_argument("--scale-jitter", type=float, default=DEFAULT_SCALE_JITTER)
+    parser.add_argument("--noise-std", type=float, default=DEFAULT_NOISE_STD)
+    parser.add_argument("--mirror-probability", type=float, default=DEFAULT_MIRROR_PROBABILITY,
+                        help="share of the training hands mirrored like a left-handed signer's")
+    parser.add_argument("--cache-file", default="", help="cache the decoded rows in this file instead of in memory")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--cpu", action="store_true", help="train on the CPU even if a GPU is available")
+    parser.add_argument("--no-web-model", action="store_true", help="do not convert the model to tfjs")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    import tensorflow as tf
+
+    if args.cpu:
+        tf.config.set_visible_devices([], 'GPU')
+    tf.keras.utils.set_random_seed(args.seed)
+
+    features, labels, classes = load_landmarks(args.train)
+    train_rows, val_rows = stratified_split(labels, args.validation_split, args.seed)
+    print(f"{len(features)} rows, {len(classes)} classes: {len(train_rows)} for training, {len(val_rows)} for validation")
+
+    train_data = make_dataset(features, labels, train_rows, args.batch_size, training=True, seed=args.seed,
+                              cache_file=args.cache_file, augment=args.augment, augment_options={
+                                  "rotation_degrees": args.rotation_degrees, "scale_jitter": args.scale_jitter,
+                                  "noise_std": args.noise_std, "mirror_probability": args.mirror_probability})
+    val_data = make_dataset(features, labels, val_rows, 4096, training=False,
+                            cache_file=args.cache_file and args.cache_file + '.validation')
+
+    steps_per_epoch = len(train_rows) // args.batch_size
+    if steps_per_epoch == 0:
+        raise SystemExit(f"--batch-size {args.batch_size} is larger than the training set ({len(train_rows)} rows)")
+    schedule = learning_rate_schedule(args.learning_rate, steps_per_epoch, args.epochs, args.warmup_epochs)
+    model = build_model(len(classes), schedule)
+    progress = make_progress_callback(steps_per_epoch * args.batch_size, args.target_accuracy, args.stop_at_target)
+
+    start = time.perf_counter()
+    history = model.fit(train_data, validation_data=val_data, epochs=args.epochs, callbacks=[progress], verbose=2)
+    train_seconds = time.perf_counter() - start
+    first_epoch_rate, steady_rate = progress.examples_per_second()
+
+    report = {
+        "train_rows": len(train_rows),
+        "validation_rows": len(val_rows),
+        "epochs": len(history.history['loss']),
+        "batch_size": args.batch_size,
+        "peak_learning_rate": args.learning_rate,
+        "augment": args.augment,
+        "train_seconds": train_seconds,
+        "examples_per_second": steady_rate,
+        "first_epoch_examples_per_second": first_epoch_rate,
+        "target_accuracy": args.target_accuracy,
+        "seconds_to_target": progress.time_to_target,
+        "epochs_to_target": progress.epochs_to_target,
+        "val_accuracy": float(history.history['val_accuracy'][-1]),
+        "devices": [device.device_type for device in tf.config.get_visible_devices()],
+    }
+    if args.test:
+        test_features, test_labels, _ = load_landmarks(args.test, classes)
+        test_data = make_dataset(test_features, test_labels, np.arange(len(test_labels)), 4096, training=False)
+        report["test_loss"], report["test_accuracy"] = map(float, model.evaluate(test_data, verbose=0))
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    h5_path = os.path.join(args.output_dir, MODEL_FILE)
+    model.save(h5_path)
+    with open(os.path.join(args.output_dir, CLASSES_FILE), 'w') as f:
+        json.dump(classes, f)
+    from numpy_model import export_npz
+    export_npz(dense_layers(model), os.path.join(args.output_dir, NUMPY_MODEL_FILE), classes=classes)
+    if not args.no_web_model:
+        report["web_model"] = export_web_model(h5_path, os.path.join(args.output_dir, WEB_MODEL_DIR))
+    with open(os.path.join(args.output_dir, REPORT_FILE), 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\nTrained {report['epochs']} epochs in {train_seconds:.1f}s: {steady_rate:,.0f} examples/sec "
+          f"({first_epoch_rate:,.0f} in the first epoch, which fills the cache)")
+    if progress.time_to_target is None:
+        print(f"Validation accuracy never reached {args.target_accuracy * 100:.1f}% (last {report['val_accuracy'] * 100:.2f}%)")
+    else:
+        print(f"Time to {args.target_accuracy * 100:.1f}% validation accuracy: {progress.time_to_target:.1f}s "
+              f"({progress.epochs_to_target} epochs)")
+    if "test_accuracy" in report:
+        print(f"Test accuracy: {report['test_accuracy'] * 100:.2f}%")
+    print(f"Model, class order, NumPy export and report written to '{args.output_dir}'")
+
+
+if __name__ == "__main__":
+    main()